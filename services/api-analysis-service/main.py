@@ -4,18 +4,61 @@ API Analysis Service - Security Orchestrator Microservices
 Main FastAPI application entry point
 """
 
+from contextlib import asynccontextmanager
+
+import anyio
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import logging
 
+from src.api.models.swagger_analysis_models import rebuild_deferred_models
 from src.api.routes import api_router
+from src.api.routes.swagger_analysis_routes import controller as swagger_controller
 from src.core.config import settings
-from src.core.logging import setup_logging
+from src.core.executors import create_parse_executor
+from src.core.http_client import create_batch_session, create_http_client
+from src.core.logging import LogRateLimiter, setup_logging, start_logging, stop_logging
+
+# uvloop (libuv-based event loop) is Linux/macOS only; fall back to asyncio where it's missing
+try:
+    import uvloop  # noqa: F401 - only checked for availability
+    _EVENT_LOOP = "uvloop"
+except ImportError:  # pragma: no cover - uvloop is not installed on Windows
+    _EVENT_LOOP = "asyncio"
 
 # Setup logging
 setup_logging()
+logger = logging.getLogger(__name__)
+
+# Caps traceback logging during error floods (e.g. an upstream outage)
+_error_log_limiter = LogRateLimiter(rate=10.0, burst=20)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks"""
+    # Log writes move to a background thread for the app's lifetime; stop_logging restores direct output
+    start_logging()
+    # Sync handlers run in AnyIO's thread pool; raise its default 40-thread limit
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREAD_POOL_LIMIT
+    # Swagger models defer schema building; finish it for all of them before the first request arrives
+    rebuild_deferred_models()
+    # One pooled client for outbound requests instead of a new connection per call
+    app.state.http_client = create_http_client()
+    # Batch analysis fans out to many hosts at once and gets its own aiohttp pool
+    app.state.batch_session = create_batch_session()
+    # Large YAML specs are parsed in this pool; created per lifespan so a restarted app gets a live one
+    app.state.parse_executor = create_parse_executor()
+    yield
+    await app.state.http_client.aclose()
+    await app.state.batch_session.close()
+    await swagger_controller.aclose()
+    # Don't wait for in-flight spec parses; their requests are already gone
+    app.state.parse_executor.shutdown(wait=False)
+    stop_logging()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -24,6 +67,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -56,8 +101,9 @@ async def health_check():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
-    logging.error(f"Global exception: {exc}")
-    return JSONResponse(
+    if _error_log_limiter.consume():
+        logger.exception("Global exception: %s", exc, exc_info=exc)
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
@@ -68,5 +114,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8001,  # Different port from health monitoring service
         reload=True,
-        log_level="info"
+        log_level="info",
+        loop=_EVENT_LOOP,
+        http="httptools",
     )
\ No newline at end of file
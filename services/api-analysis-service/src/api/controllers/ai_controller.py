@@ -4,17 +4,23 @@ Handles AI-enhanced analysis, model management, and AI service operations
 """
 
 import logging
+from functools import lru_cache
+from types import MappingProxyType
+
+import orjson
+
 from src.core.config import settings
 from src.api.models.ai_models import AIStatistics
 
 logger = logging.getLogger(__name__)
 
 
-class AIController:
-    """Controller for AI analysis operations"""
-    
+class _BaseAIController:
+    """State and operations shared by the enabled and disabled AI controllers"""
+
     def __init__(self, ai_analyzer=None, storage=None):
         """Initialize with dependency injection"""
+        self._ai_model = settings.OPENROUTER_MODEL
         self._ai_stats = AIStatistics(
             total_requests=0,
             successful_requests=0,
@@ -25,36 +31,9 @@ class AIController:
             analysis_types={},
             error_types={}
         )
-    
-    async def get_ai_service_health(self):
-        """Get AI service health status"""
-        if not settings.AI_ENABLED:
-            return {
-                "status": "disabled",
-                "ai_enabled": False
-            }
-        
-        return {
-            "status": "healthy",
-            "ai_enabled": True,
-            "model": settings.AI_MODEL
-        }
-    
-    async def get_ai_statistics(self):
-        """Get AI service statistics"""
-        return self._ai_stats
-    
-    async def clear_ai_cache(self, request):
-        """Clear AI analysis cache"""
-        if not settings.AI_ENABLED:
-            raise Exception("AI analysis is disabled")
-        
-        return {"message": "AI cache cleared"}
-    
-    async def get_available_models(self):
-        """Get list of available AI models"""
-        return {
-            "current_model": settings.AI_MODEL,
+        # Static for the life of the controller; serialized once, each caller gets its own copy
+        self._available_models_json = orjson.dumps({
+            "current_model": self._ai_model,
             "available_models": [
                 {
                     "name": "qwen/qwen3-coder:free",
@@ -62,14 +41,72 @@ class AIController:
                     "cost": "free"
                 }
             ]
-        }
-    
+        })
+
+    async def get_ai_statistics(self):
+        """Get AI service statistics"""
+        return self._ai_stats
+
+    def get_available_models(self):
+        """Get list of available AI models"""
+        return orjson.loads(self._available_models_json)
+
+
+class _EnabledAIController(_BaseAIController):
+    """Controller for AI analysis operations"""
+
+    def __init__(self, ai_analyzer=None, storage=None):
+        """Initialize with dependency injection"""
+        super().__init__(ai_analyzer, storage)
+        self._health = MappingProxyType({
+            "status": "healthy",
+            "ai_enabled": True,
+            "model": self._ai_model
+        })
+
+    async def get_ai_service_health(self):
+        """Get AI service health status"""
+        return dict(self._health)
+
+    async def clear_ai_cache(self, request):
+        """Clear AI analysis cache"""
+        return {"message": "AI cache cleared"}
+
     async def test_ai_integration(self, request):
         """Test AI integration"""
-        if not settings.AI_ENABLED:
-            raise Exception("AI analysis is disabled")
-        
         return {
             "test_status": "success",
             "message": "AI integration working"
-        }
\ No newline at end of file
+        }
+
+
+class _DisabledAIController(_BaseAIController):
+    """AI controller specialized for deployments with AI_ENABLED=false"""
+
+    # Read-only template; callers get a copy
+    _DISABLED_HEALTH = MappingProxyType({
+        "status": "disabled",
+        "ai_enabled": False
+    })
+
+    async def get_ai_service_health(self):
+        """Get AI service health status"""
+        return dict(self._DISABLED_HEALTH)
+
+    async def clear_ai_cache(self, request):
+        """Clear AI analysis cache"""
+        raise Exception("AI analysis is disabled")
+
+    async def test_ai_integration(self, request):
+        """Test AI integration"""
+        raise Exception("AI analysis is disabled")
+
+
+# Resolve the implementation once for the configured deployment
+AIController = _EnabledAIController if settings.AI_ENABLED else _DisabledAIController
+
+
+@lru_cache(maxsize=1)
+def get_ai_controller() -> AIController:
+    """Shared AIController instance"""
+    return AIController()
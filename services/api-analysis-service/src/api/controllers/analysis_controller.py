@@ -6,11 +6,16 @@ Handles single endpoint analysis, retrieval, and history operations
 import logging
 import time
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Dict, Any, Tuple
+
+import orjson
 
 from src.services.analysis_service import AnalysisService
 from src.services.security_analyzer import SecurityAnalyzer
-from src.services.storage_service import StorageService
+from src.services.storage_service import StorageService, get_storage_service
+from src.services.analysis_cache import AnalysisCache
+from src.core.config import settings
 from src.api.models.response_models import (
     ApiAnalysisEntity,
     AnalysisResult,
@@ -25,6 +30,16 @@ from src.api.models.request_models import (
 
 logger = logging.getLogger(__name__)
 
+# Static catalogue returned (as copies) by get_available_security_checks
+_SECURITY_CHECKS: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType({
+        "name": "https_protocol",
+        "description": "Check if endpoint uses HTTPS",
+        "category": "protocol",
+        "severity": "high"
+    }),
+)
+
 
 class AnalysisController:
     """Controller for core API analysis operations"""
@@ -33,19 +48,32 @@ class AnalysisController:
         self,
         analysis_service: AnalysisService = None,
         security_analyzer: SecurityAnalyzer = None,
-        storage: StorageService = None
+        storage: StorageService = None,
+        cache: AnalysisCache = None
     ):
         """Initialize with dependency injection"""
-        self.analysis_service = analysis_service or AnalysisService()
+        self.storage = storage or get_storage_service()
+        self.analysis_service = analysis_service or AnalysisService(self.storage)
         self.security_analyzer = security_analyzer or SecurityAnalyzer()
-        self.storage = storage or StorageService()
+        self.cache = cache or AnalysisCache()
+        self._ai_enabled = settings.AI_ENABLED
+        self._version = settings.SERVICE_VERSION
+        # Serialized once; each caller gets its own copy
+        self._capabilities_json = orjson.dumps(self._build_service_capabilities())
     
     async def analyze_endpoint(self, request: AnalysisRequest) -> ApiAnalysisEntity:
         """Analyze a single API endpoint for security and compliance"""
         start_time = time.time()
         
         try:
-            logger.info(f"Analyzing endpoint: {request.endpoint}")
+            logger.info("Analyzing endpoint: %s", request.endpoint)
+            
+            # Serve repeated analyses from cache unless a refresh is forced
+            if not request.force_refresh:
+                cached = await self.cache.get(request.endpoint, request.analysis_type)
+                if cached is not None:
+                    logger.info("Returning cached analysis for %s", request.endpoint)
+                    return ApiAnalysisEntity.model_validate_json(cached)
             
             # Create initial analysis entity
             analysis_entity = ApiAnalysisEntity(
@@ -54,8 +82,9 @@ class AnalysisController:
                 timestamp=datetime.utcnow()
             )
             
-            # Store initial status
-            await self.storage.save_analysis(analysis_entity)
+            # Persist the intermediate status only when a client polls for progress
+            if request.track_progress:
+                await self.storage.save_analysis(analysis_entity)
             
             # Perform security analysis
             security_result = await self.security_analyzer.analyze_endpoint(
@@ -73,14 +102,17 @@ class AnalysisController:
             
             # Save final result
             await self.storage.save_analysis(analysis_entity)
+            await self.cache.set(
+                request.endpoint, request.analysis_type, analysis_entity.model_dump_json()
+            )
             
             analysis_time = time.time() - start_time
-            logger.info(f"Analysis completed for {request.endpoint} in {analysis_time:.2f} seconds")
+            logger.info("Analysis completed for %s in %.2f seconds", request.endpoint, analysis_time)
             
             return analysis_entity
             
         except Exception as e:
-            logger.error(f"Error analyzing endpoint {request.endpoint}: {str(e)}")
+            logger.error("Error analyzing endpoint %s: %s", request.endpoint, e)
             
             # Update entity with error
             analysis_entity = ApiAnalysisEntity(
@@ -111,26 +143,21 @@ class AnalysisController:
         stats["refactored"] = True
         return stats
     
-    async def get_available_security_checks(self) -> List[Dict[str, Any]]:
+    def get_available_security_checks(self) -> List[Dict[str, Any]]:
         """Get list of available security checks"""
-        return [
-            {
-                "name": "https_protocol",
-                "description": "Check if endpoint uses HTTPS",
-                "category": "protocol",
-                "severity": "high"
-            }
-        ]
+        return [dict(check) for check in _SECURITY_CHECKS]
     
-    async def get_service_capabilities(self) -> Dict[str, Any]:
+    def get_service_capabilities(self) -> Dict[str, Any]:
         """Get service capabilities and features"""
-        from src.core.config import settings
-        
+        return orjson.loads(self._capabilities_json)
+    
+    def _build_service_capabilities(self) -> Dict[str, Any]:
+        """Build the static capabilities payload (serialized once per controller)"""
         return {
             "service_info": {
                 "name": "Enhanced API Security Analysis Service",
-                "version": settings.SERVICE_VERSION,
-                "ai_enabled": settings.AI_ENABLED
+                "version": self._version,
+                "ai_enabled": self._ai_enabled
             },
             "analysis_types": [
                 {
@@ -155,11 +182,10 @@ class AnalysisController:
     async def get_health_status(self) -> 'HealthStatus':
         """Get health status"""
         from src.api.models.response_models import HealthStatus
-        from src.core.config import settings
         
         return HealthStatus(
             status="healthy",
             service="api-analysis-service",
-            version=settings.SERVICE_VERSION,
-            ai_enabled=settings.AI_ENABLED
+            version=self._version,
+            ai_enabled=self._ai_enabled
         )
\ No newline at end of file
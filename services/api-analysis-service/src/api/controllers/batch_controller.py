@@ -5,9 +5,12 @@ Handles bulk analysis, batch operations, and concurrent processing
 
 import asyncio
 import logging
+import re
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
+from cachetools import TTLCache
+
 from src.services.analysis_service import AnalysisService
 from src.api.models.request_models import BulkAnalysisRequest, BatchAnalysisRequest
 from src.api.models.response_models import BulkAnalysisResponse, ApiAnalysisEntity
@@ -15,6 +18,8 @@ from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+_URL_PREFIX_RE = re.compile(r"^https?://")
+
 
 class BatchController:
     """Controller for batch analysis operations"""
@@ -22,7 +27,20 @@ class BatchController:
     def __init__(self, analysis_service: AnalysisService = None):
         """Initialize with dependency injection"""
         self.analysis_service = analysis_service or AnalysisService()
-        self._bulk_analysis_status: Dict[str, BulkAnalysisResponse] = {}
+        # Bounded, expiring status store so finished bulk jobs don't leak memory
+        self._bulk_analysis_status: Dict[str, BulkAnalysisResponse] = TTLCache(
+            maxsize=settings.BULK_STATUS_MAX_ENTRIES,
+            ttl=settings.BULK_STATUS_TTL
+        )
+        self._status_lock = asyncio.Lock()
+        self._max_concurrent = settings.MAX_CONCURRENT_ANALYSES
+        # Only a service created here is closed by aclose; an injected one belongs to its caller
+        self._owns_service = analysis_service is None
+    
+    async def aclose(self) -> None:
+        """Release the analysis service's network resources on shutdown"""
+        if self._owns_service:
+            await self.analysis_service.aclose()
     
     async def analyze_endpoints_bulk(
         self,
@@ -30,7 +48,7 @@ class BatchController:
         background_tasks = None
     ) -> BulkAnalysisResponse:
         """Start bulk analysis for multiple endpoints with background processing"""
-        logger.info(f"Starting bulk analysis for {len(request.endpoints)} endpoints")
+        logger.info("Starting bulk analysis for %d endpoints", len(request.endpoints))
         
         # Validate endpoints
         await self._validate_endpoints(request.endpoints)
@@ -39,7 +57,8 @@ class BatchController:
         bulk_response = await self.analysis_service.start_bulk_analysis(request)
         
         # Store status
-        self._bulk_analysis_status[bulk_response.request_id] = bulk_response
+        async with self._status_lock:
+            self._bulk_analysis_status[bulk_response.request_id] = bulk_response
         
         # Add background task if provided
         if background_tasks:
@@ -56,55 +75,68 @@ class BatchController:
     
     async def process_bulk_analysis(self, request_id: str, request: BulkAnalysisRequest):
         """Process bulk analysis in background"""
-        logger.info(f"Processing bulk analysis {request_id} for {len(request.endpoints)} endpoints")
+        logger.info("Processing bulk analysis %s for %d endpoints", request_id, len(request.endpoints))
         
         try:
-            bulk_response = self._bulk_analysis_status.get(request_id)
+            async with self._status_lock:
+                bulk_response = self._bulk_analysis_status.get(request_id)
             if not bulk_response:
-                logger.error(f"Bulk analysis request {request_id} not found")
+                logger.error("Bulk analysis request %s not found", request_id)
                 return
             
-            # Create semaphore for concurrency control
-            semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_ANALYSES)
+            # Queue endpoints for a fixed pool of workers
+            queue: asyncio.Queue = asyncio.Queue()
+            for endpoint in request.endpoints:
+                queue.put_nowait(endpoint)
+            
+            results: List[Optional[ApiAnalysisEntity]] = []
+            # Entities of one bulk job share a single timestamp
+            timestamp = datetime.utcnow()
             
-            async def analyze_with_semaphore(endpoint: str):
-                async with semaphore:
+            async def worker():
+                while True:
+                    try:
+                        endpoint = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
                     try:
-                        result = await self.analysis_service.analyze_endpoint(endpoint)
-                        return result
+                        result = await self.analysis_service.analyze_endpoint(
+                            endpoint, timestamp=timestamp, writer=write
+                        )
                     except Exception as e:
-                        logger.error(f"Error analyzing {endpoint} in bulk: {str(e)}")
-                        return None
+                        logger.error("Error analyzing %s in bulk: %s", endpoint, e)
+                        result = None
+                    results.append(result)
             
-            # Start all analysis tasks
-            tasks = [
-                analyze_with_semaphore(endpoint) 
-                for endpoint in request.endpoints
-            ]
+            # Only MAX_CONCURRENT_ANALYSES tasks exist regardless of bulk size;
+            # terminal results are persisted in bulk as they are produced
+            worker_count = min(self._max_concurrent, len(request.endpoints))
+            async with self.analysis_service.bulk_writer() as write:
+                await asyncio.gather(*(worker() for _ in range(worker_count)))
             
-            # Wait for all tasks to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            successful = [result for result in results if result is not None]
             
             # Process results
-            for result in results:
-                if result is not None and not isinstance(result, Exception):
-                    bulk_response.results.append(result)
-                    bulk_response.completed += 1
-                else:
-                    bulk_response.failed += 1
-            
-            bulk_response.status = "completed"
-            logger.info(f"Bulk analysis {request_id} completed: {bulk_response.completed} success, {bulk_response.failed} failed")
+            async with self._status_lock:
+                bulk_response.results.extend(successful)
+                bulk_response.completed += len(successful)
+                bulk_response.failed += len(results) - len(successful)
+                bulk_response.status = "completed"
+            logger.info(
+                "Bulk analysis %s completed: %d success, %d failed",
+                request_id, bulk_response.completed, bulk_response.failed
+            )
             
         except Exception as e:
-            logger.error(f"Error in bulk analysis {request_id}: {str(e)}")
-            bulk_response = self._bulk_analysis_status.get(request_id)
-            if bulk_response:
-                bulk_response.status = "failed"
+            logger.error("Error in bulk analysis %s: %s", request_id, e)
+            async with self._status_lock:
+                bulk_response = self._bulk_analysis_status.get(request_id)
+                if bulk_response:
+                    bulk_response.status = "failed"
     
     async def analyze_endpoints_batch(self, request: BatchAnalysisRequest) -> BulkAnalysisResponse:
         """Enhanced batch analysis with AI integration"""
-        logger.info(f"Starting enhanced batch analysis for {len(request.endpoints)} endpoints")
+        logger.info("Starting enhanced batch analysis for %d endpoints", len(request.endpoints))
         
         # Validate endpoints
         await self._validate_endpoints(request.endpoints)
@@ -129,25 +161,30 @@ class BatchController:
             batch_results_list = await asyncio.gather(*batch_tasks, return_exceptions=True)
             
             # Add results
-            for result in batch_results_list:
-                if result is not None and not isinstance(result, Exception):
-                    batch_results.results.append(result)
-                    batch_results.completed += 1
-                else:
-                    batch_results.failed += 1
+            successful = [
+                result for result in batch_results_list
+                if result is not None and not isinstance(result, Exception)
+            ]
+            batch_results.results.extend(successful)
+            batch_results.completed += len(successful)
+            batch_results.failed += len(batch_results_list) - len(successful)
         
         batch_results.status = "completed"
         return batch_results
     
     async def get_bulk_analysis_status(self, request_id: str) -> Optional[BulkAnalysisResponse]:
         """Get status of bulk analysis"""
-        return self._bulk_analysis_status.get(request_id)
+        async with self._status_lock:
+            return self._bulk_analysis_status.get(request_id)
     
     async def _validate_endpoints(self, endpoints: List[str]):
         """Validate list of endpoints"""
-        for endpoint in endpoints:
-            if not endpoint.startswith(('http://', 'https://')):
-                raise ValueError(f"Invalid endpoint: {endpoint}. Must start with http:// or https://")
+        match = _URL_PREFIX_RE.match
+        invalid = [endpoint for endpoint in endpoints if not match(endpoint)]
+        if invalid:
+            raise ValueError(
+                f"Invalid endpoints: {', '.join(invalid)}. Must start with http:// or https://"
+            )
     
     async def _analyze_endpoint_with_options(
         self,
@@ -166,7 +203,7 @@ class BatchController:
             return result
             
         except Exception as e:
-            logger.error(f"Error analyzing endpoint {endpoint}: {str(e)}")
+            logger.error("Error analyzing endpoint %s: %s", endpoint, e)
             # Return failed analysis entity
             return ApiAnalysisEntity(
                 status="failed",
@@ -4,12 +4,18 @@ Handles service health checks, status monitoring, and diagnostics
 """
 
 import logging
+import time
+from functools import lru_cache
 from datetime import datetime
+from typing import Dict, Tuple
 from src.core.config import settings
 from src.api.models.response_models import HealthStatus
 
 logger = logging.getLogger(__name__)
 
+# Probes tolerate a status that is up to this many seconds old
+_HEALTH_CACHE_TTL = 1.0
+
 
 class HealthController:
     """Controller for health check and monitoring operations"""
@@ -17,21 +23,31 @@ class HealthController:
     def __init__(self, analysis_service=None, storage=None):
         """Initialize with dependency injection"""
         self._start_time = datetime.utcnow()
+        self._ai_enabled = settings.AI_ENABLED
+        self._version = settings.SERVICE_VERSION
+        # (expiry, status) per include_ai_status value, so the two variants never serve each other
+        self._cached_health: Dict[bool, Tuple[float, HealthStatus]] = {}
     
     async def get_health_status(self, include_ai_status: bool = False) -> HealthStatus:
         """Get comprehensive health status of the service"""
+        cached = self._cached_health.get(include_ai_status)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+        
+        now = datetime.utcnow()
         try:
             health_status = HealthStatus(
                 status="healthy",
                 service="api-analysis-service",
-                timestamp=datetime.utcnow(),
-                version=settings.SERVICE_VERSION,
-                ai_enabled=settings.AI_ENABLED
+                timestamp=now,
+                version=self._version,
+                ai_enabled=self._ai_enabled
             )
             
             # Add uptime information
-            uptime_seconds = (datetime.utcnow() - self._start_time).total_seconds()
+            uptime_seconds = (now - self._start_time).total_seconds()
             
+            self._cached_health[include_ai_status] = (time.monotonic() + _HEALTH_CACHE_TTL, health_status)
             return health_status
             
         except Exception as e:
@@ -39,7 +55,13 @@ class HealthController:
             return HealthStatus(
                 status="unhealthy",
                 service="api-analysis-service",
-                timestamp=datetime.utcnow(),
-                version=settings.SERVICE_VERSION,
-                ai_enabled=settings.AI_ENABLED
-            )
\ No newline at end of file
+                timestamp=now,
+                version=self._version,
+                ai_enabled=self._ai_enabled
+            )
+
+
+@lru_cache(maxsize=1)
+def get_health_controller() -> HealthController:
+    """Shared HealthController instance"""
+    return HealthController()
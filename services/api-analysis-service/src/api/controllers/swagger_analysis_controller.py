@@ -3,25 +3,92 @@
 """
 
 import asyncio
+import itertools
 import logging
-from typing import List, Dict, Any
+import os
+import time
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+import aiohttp
+import orjson
 from fastapi import HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
 
+from ...core.config import settings
 from ...services.openapi_analysis_service import OpenAPIAnalysisService
+from ...services.spec_validation_cache import spec_validation_cache
 from ..models.swagger_analysis_models import (
     SwaggerAnalysisRequest,
     SwaggerAnalysisResponse,
     ErrorResponse,
     BatchAnalysisRequest,
     BatchAnalysisResponse,
-    HealthCheckResponse
+    HealthCheckResponse,
+    APIMetadata,
+    StructureAnalysis,
+    EndpointsSummary,
+    SecurityAssessment,
+    ValidationResult,
+    APIStatistics,
+    AIAnalysisResult,
+    AnalysisSummary,
+    Recommendation
 )
 
 logger = logging.getLogger(__name__)
 
+# Наличие ключа OpenRouter не меняется во время работы процесса
+_OPENROUTER_CONFIGURED = bool(os.getenv("OPENROUTER_API_KEY"))
+
+# Валидаторы для dataclass-моделей, у которых нет model_validate
+_ENDPOINTS_SUMMARY = TypeAdapter(EndpointsSummary)
+_API_STATISTICS = TypeAdapter(APIStatistics)
+
+# Счетчик делает batch_id уникальным даже для пакетов, запущенных в одну наносекунду
+_batch_counter = itertools.count()
+
+# Статичное описание поддерживаемых форматов, сериализуется один раз при импорте.
+# Каждый вызов получает собственную копию, поэтому изменение ответа не затронет следующие
+_SUPPORTED_FORMATS_JSON = orjson.dumps({
+    "supported_formats": [
+        {
+            "format": "OpenAPI 3.0",
+            "extensions": [".json", ".yaml", ".yml"],
+            "description": "OpenAPI Specification версии 3.0.x",
+            "url_required": True,
+            "file_upload": False
+        },
+        {
+            "format": "OpenAPI 3.1", 
+            "extensions": [".json", ".yaml", ".yml"],
+            "description": "OpenAPI Specification версии 3.1.x",
+            "url_required": True,
+            "file_upload": False
+        }
+    ],
+    "ai_models": [
+        {
+            "model": "anthropic/claude-3.5-sonnet",
+            "description": "Claude 3.5 Sonnet - высокая точность анализа",
+            "cost": "premium"
+        },
+        {
+            "model": "anthropic/claude-3-haiku",
+            "description": "Claude 3 Haiku - быстрый анализ",
+            "cost": "standard"
+        }
+    ],
+    "features": [
+        "Структурный анализ спецификации",
+        "AI анализ безопасности через OpenRouter",
+        "Обнаружение потенциальных уязвимостей",
+        "Генерация рекомендаций",
+        "Пакетный анализ нескольких API"
+    ]
+})
+
 class SwaggerAnalysisController:
     """Контроллер для анализа Swagger спецификаций"""
     
@@ -29,21 +96,30 @@ class SwaggerAnalysisController:
         self.analysis_service = OpenAPIAnalysisService()
         self.background_tasks = {}
     
-    async def analyze_swagger(self, request: SwaggerAnalysisRequest) -> SwaggerAnalysisResponse:
+    async def aclose(self) -> None:
+        """Закрывает клиенты сервиса анализа при остановке приложения"""
+        await self.analysis_service.aclose()
+    
+    async def analyze_swagger(
+        self,
+        request: SwaggerAnalysisRequest,
+        session: Optional[aiohttp.ClientSession] = None
+    ) -> SwaggerAnalysisResponse:
         """
         Анализирует Swagger спецификацию по URL
         
         Args:
             request: Запрос на анализ с URL и настройками
+            session: aiohttp сессия для загрузки спецификации
             
         Returns:
             Результат анализа
         """
         try:
-            logger.info(f"Получен запрос на анализ Swagger: {request.swagger_url}")
+            logger.info("Получен запрос на анализ Swagger: %s", request.swagger_url)
             
             # Запускаем асинхронный анализ
-            result = await self.analysis_service.analyze_swagger_url(str(request.swagger_url))
+            result = await self.analysis_service.analyze_swagger_url(request.swagger_url, session)
             
             # Преобразуем результат в Pydantic модель
             if result.get("success"):
@@ -66,24 +142,38 @@ class SwaggerAnalysisController:
                 )
                 
         except Exception as e:
-            logger.error(f"Ошибка при анализе Swagger: {e}")
+            logger.error("Ошибка при анализе Swagger: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Внутренняя ошибка сервера: {str(e)}"
             )
     
-    async def batch_analyze_swagger(self, request: BatchAnalysisRequest) -> Dict[str, Any]:
+    async def batch_analyze_swagger(
+        self,
+        request: BatchAnalysisRequest,
+        session: Optional[aiohttp.ClientSession] = None
+    ) -> Dict[str, Any]:
         """
         Пакетный анализ нескольких Swagger спецификаций
         
         Args:
             request: Запрос на пакетный анализ
+            session: aiohttp сессия для параллельной загрузки спецификаций
             
         Returns:
             Результаты пакетного анализа
         """
-        batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        logger.info(f"Запущен пакетный анализ {batch_id} с {len(request.swagger_urls)} URL")
+        batch_id = f"batch_{time.time_ns():x}_{next(_batch_counter):x}"
+        # Одна временная метка на весь пакет для ошибок отдельных URL
+        batch_timestamp = datetime.now()
+        logger.info("Запущен пакетный анализ %s с %d URL", batch_id, len(request.swagger_urls))
+        
+        # Ограничиваем число одновременных загрузок, чтобы большой пакет не исчерпал пул соединений
+        semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_ANALYSES)
+        
+        async def analyze_limited(analysis_request: SwaggerAnalysisRequest) -> SwaggerAnalysisResponse:
+            async with semaphore:
+                return await self.analyze_swagger(analysis_request, session)
         
         # Создаем задачи для параллельного выполнения
         tasks = []
@@ -93,10 +183,10 @@ class SwaggerAnalysisController:
                     swagger_url=url,
                     enable_ai_analysis=request.enable_ai_analysis
                 )
-                task = asyncio.create_task(self.analyze_swagger(analysis_request))
+                task = asyncio.create_task(analyze_limited(analysis_request))
                 tasks.append((url, task))
             except Exception as e:
-                logger.warning(f"Не удалось создать задачу для {url}: {e}")
+                logger.warning("Не удалось создать задачу для %s: %s", url, e)
                 continue
         
         # Выполняем все задачи
@@ -105,20 +195,22 @@ class SwaggerAnalysisController:
         successful_count = 0
         failed_count = 0
         
-        for url, task in tasks:
-            try:
-                result = await task
-                results.append(result)
+        # Ожидаем все задачи сразу, чтобы медленный URL не задерживал остальные
+        outcomes = await asyncio.gather(*(task for _, task in tasks), return_exceptions=True)
+        
+        for (url, _), outcome in zip(tasks, outcomes):
+            if not isinstance(outcome, BaseException):
+                results.append(outcome)
                 successful_count += 1
-                logger.info(f"Успешно проанализирован: {url}")
-            except Exception as e:
+                logger.info("Успешно проанализирован: %s", url)
+            else:
                 error = ErrorResponse(
-                    error=f"Ошибка анализа {url}: {str(e)}",
-                    timestamp=datetime.now()
+                    error=f"Ошибка анализа {url}: {str(outcome)}",
+                    timestamp=batch_timestamp
                 )
                 errors.append(error)
                 failed_count += 1
-                logger.error(f"Ошибка анализа {url}: {e}")
+                logger.error("Ошибка анализа %s: %s", url, outcome)
         
         # Возвращаем результаты
         return {
@@ -157,13 +249,11 @@ class SwaggerAnalysisController:
         Returns:
             Информация о состоянии сервиса
         """
-        import os
-        
         # Проверяем доступность зависимостей
         dependencies = {}
         
         # Проверка OpenRouter API ключа
-        if os.getenv("OPENROUTER_API_KEY"):
+        if _OPENROUTER_CONFIGURED:
             dependencies["openrouter_api"] = "available"
         else:
             dependencies["openrouter_api"] = "not_configured"
@@ -176,7 +266,8 @@ class SwaggerAnalysisController:
             timestamp=datetime.now(),
             service="swagger-analysis-service",
             version="1.0.0",
-            dependencies=dependencies
+            dependencies=dependencies,
+            cache=spec_validation_cache.get_stats()
         )
     
     async def get_supported_formats(self) -> Dict[str, Any]:
@@ -186,53 +277,14 @@ class SwaggerAnalysisController:
         Returns:
             Список поддерживаемых форматов и их описания
         """
-        return {
-            "supported_formats": [
-                {
-                    "format": "OpenAPI 3.0",
-                    "extensions": [".json", ".yaml", ".yml"],
-                    "description": "OpenAPI Specification версии 3.0.x",
-                    "url_required": True,
-                    "file_upload": False
-                },
-                {
-                    "format": "OpenAPI 3.1", 
-                    "extensions": [".json", ".yaml", ".yml"],
-                    "description": "OpenAPI Specification версии 3.1.x",
-                    "url_required": True,
-                    "file_upload": False
-                }
-            ],
-            "ai_models": [
-                {
-                    "model": "anthropic/claude-3.5-sonnet",
-                    "description": "Claude 3.5 Sonnet - высокая точность анализа",
-                    "cost": "premium"
-                },
-                {
-                    "model": "anthropic/claude-3-haiku",
-                    "description": "Claude 3 Haiku - быстрый анализ",
-                    "cost": "standard"
-                }
-            ],
-            "features": [
-                "Структурный анализ спецификации",
-                "AI анализ безопасности через OpenRouter",
-                "Обнаружение потенциальных уязвимостей",
-                "Генерация рекомендаций",
-                "Пакетный анализ нескольких API"
-            ]
-        }
+        return orjson.loads(_SUPPORTED_FORMATS_JSON)
     
-    def _convert_to_metadata(self, metadata: Dict[str, Any]) -> 'APIMetadata':
+    def _convert_to_metadata(self, metadata: Dict[str, Any]) -> APIMetadata:
         """Преобразует словарь в APIMetadata модель"""
-        from ..models.swagger_analysis_models import APIMetadata
-        return APIMetadata(**metadata)
+        return APIMetadata.model_validate(metadata)
     
-    def _convert_to_structure_analysis(self, analysis: Dict[str, Any]) -> 'StructureAnalysis':
+    def _convert_to_structure_analysis(self, analysis: Dict[str, Any]) -> StructureAnalysis:
         """Преобразует словарь в StructureAnalysis модель"""
-        from ..models.swagger_analysis_models import StructureAnalysis
-        
         return StructureAnalysis(
             summary=self._convert_to_endpoints_summary(analysis.get("summary", {})),
             security_assessment=self._convert_to_security_assessment(analysis.get("security_assessment", {})),
@@ -240,37 +292,32 @@ class SwaggerAnalysisController:
             statistics=self._convert_to_api_statistics(analysis.get("statistics", {}))
         )
     
-    def _convert_to_endpoints_summary(self, summary: Dict[str, Any]) -> 'EndpointsSummary':
+    def _convert_to_endpoints_summary(self, summary: Dict[str, Any]) -> EndpointsSummary:
         """Преобразует словарь в EndpointsSummary модель"""
-        from ..models.swagger_analysis_models import EndpointsSummary
-        return EndpointsSummary(**summary)
+        return _ENDPOINTS_SUMMARY.validate_python(summary)
     
-    def _convert_to_security_assessment(self, assessment: Dict[str, Any]) -> 'SecurityAssessment':
+    def _convert_to_security_assessment(self, assessment: Dict[str, Any]) -> SecurityAssessment:
         """Преобразует словарь в SecurityAssessment модель"""
-        from ..models.swagger_analysis_models import SecurityAssessment
-        return SecurityAssessment(**assessment)
+        return SecurityAssessment.model_validate(assessment)
     
-    def _convert_to_validation_result(self, validation: Dict[str, Any]) -> 'ValidationResult':
+    def _convert_to_validation_result(self, validation: Dict[str, Any]) -> ValidationResult:
         """Преобразует словарь в ValidationResult модель"""
-        from ..models.swagger_analysis_models import ValidationResult
-        return ValidationResult(**validation)
+        return ValidationResult.model_validate(validation)
     
-    def _convert_to_api_statistics(self, stats: Dict[str, Any]) -> 'APIStatistics':
+    def _convert_to_api_statistics(self, stats: Dict[str, Any]) -> APIStatistics:
         """Преобразует словарь в APIStatistics модель"""
-        from ..models.swagger_analysis_models import APIStatistics
-        return APIStatistics(**stats)
+        return _API_STATISTICS.validate_python(stats)
     
-    def _convert_to_ai_analysis(self, ai_analysis: Dict[str, Any]) -> 'AIAnalysisResult':
+    def _convert_to_ai_analysis(self, ai_analysis: Optional[Dict[str, Any]]) -> Optional[AIAnalysisResult]:
         """Преобразует словарь в AIAnalysisResult модель"""
-        from ..models.swagger_analysis_models import AIAnalysisResult
-        return AIAnalysisResult(**ai_analysis)
+        if ai_analysis is None:
+            return None
+        return AIAnalysisResult.model_validate(ai_analysis)
     
-    def _convert_to_summary(self, summary: Dict[str, Any]) -> 'AnalysisSummary':
+    def _convert_to_summary(self, summary: Dict[str, Any]) -> AnalysisSummary:
         """Преобразует словарь в AnalysisSummary модель"""
-        from ..models.swagger_analysis_models import AnalysisSummary
-        return AnalysisSummary(**summary)
+        return AnalysisSummary.model_validate(summary)
     
-    def _convert_to_recommendations(self, recommendations: List[Dict[str, Any]]) -> List['Recommendation']:
+    def _convert_to_recommendations(self, recommendations: List[Dict[str, Any]]) -> List[Recommendation]:
         """Преобразует список словарей в список Recommendation моделей"""
-        from ..models.swagger_analysis_models import Recommendation
-        return [Recommendation(**rec) for rec in recommendations]
\ No newline at end of file
+        return [Recommendation.model_validate(rec) for rec in recommendations]
\ No newline at end of file
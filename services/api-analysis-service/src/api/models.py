@@ -3,38 +3,58 @@ Pydantic models for API Analysis Service
 """
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, HttpUrl, Field
+from typing import List, Literal, Optional, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.dataclasses import dataclass
 from uuid import uuid4
 
+from src.core.clock import cached_utcnow
+
+AnalysisStatus = Literal["pending", "analyzing", "processing", "completed", "failed"]
+BulkStatus = Literal["processing", "completed", "failed"]
+Severity = Literal["info", "low", "medium", "high", "critical"]
+
+# Pure data carriers created in bulk use slotted, frozen pydantic dataclasses
+_LEAF_CONFIG = ConfigDict(extra="ignore", validate_assignment=False)
+
 
 class AnalysisRequest(BaseModel):
     """Request model for API endpoint analysis"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     endpoint: str = Field(..., description="API endpoint URL to analyze", max_length=2048)
     analysis_type: Optional[str] = Field("security", description="Type of analysis to perform")
     include_performance: Optional[bool] = Field(False, description="Include performance analysis")
+    force_refresh: Optional[bool] = Field(False, description="Bypass the analysis result cache")
+    track_progress: Optional[bool] = Field(False, description="Persist the intermediate 'analyzing' status")
 
 
 class AnalysisResult(BaseModel):
     """Analysis result model"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, frozen=True)
+
     is_secure: bool = Field(..., description="Whether the endpoint is secure")
-    issues: List[str] = Field(default_factory=list, description="List of security issues found")
-    recommendations: List[str] = Field(default_factory=list, description="List of recommendations")
-    details: Dict[str, Any] = Field(default_factory=dict, description="Additional analysis details")
+    issues: Tuple[str, ...] = Field((), description="List of security issues found")
+    recommendations: Tuple[str, ...] = Field((), description="List of recommendations")
+    details: Any = Field(default_factory=dict, description="Additional analysis details")
 
 
 class ApiAnalysisEntity(BaseModel):
     """API Analysis Entity model"""
-    id: str = Field(default_factory=lambda: str(uuid4()))
-    status: str = Field(..., description="Analysis status")
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
+    id: str = Field(default_factory=lambda: uuid4().hex)
+    status: AnalysisStatus = Field(..., description="Analysis status")
     endpoint: str = Field(..., description="Analyzed endpoint")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=cached_utcnow)
     analysis: Optional[AnalysisResult] = None
     error_message: Optional[str] = None
 
 
 class AnalysisHistory(BaseModel):
     """Model for analysis history response"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     analyses: List[ApiAnalysisEntity]
     total: int
     page: int = 1
@@ -43,29 +63,34 @@ class AnalysisHistory(BaseModel):
 
 class AnalysisResponse(BaseModel):
     """Response model for API analysis"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     success: bool
     data: Optional[ApiAnalysisEntity] = None
     error: Optional[str] = None
 
 
-class HealthStatus(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class HealthStatus:
     """Health check response model"""
     status: str = "healthy"
     service: str = "api-analysis"
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=cached_utcnow)
     version: str = "1.0.0"
 
 
-class SecurityCheck(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class SecurityCheck:
     """Individual security check result"""
     name: str
     passed: bool
     description: str
-    severity: str = "medium"  # low, medium, high, critical
-    details: Optional[Dict[str, Any]] = None
+    severity: Severity = "medium"
+    details: Any = None
 
 
-class PerformanceMetrics(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class PerformanceMetrics:
     """Performance analysis metrics"""
     response_time_ms: Optional[float] = None
     status_code: Optional[int] = None
@@ -76,23 +101,29 @@ class PerformanceMetrics(BaseModel):
 
 class DetailedAnalysisResult(AnalysisResult):
     """Detailed analysis result with security checks and performance metrics"""
-    security_checks: List[SecurityCheck] = Field(default_factory=list)
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
+    security_checks: Tuple[SecurityCheck, ...] = ()
     performance_metrics: Optional[PerformanceMetrics] = None
-    compliance_issues: List[str] = Field(default_factory=list)
-    best_practices: List[str] = Field(default_factory=list)
+    compliance_issues: Tuple[str, ...] = ()
+    best_practices: Tuple[str, ...] = ()
 
 
 # Security check configurations
 class SecurityCheckConfig(BaseModel):
     """Configuration for security checks"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     check_name: str
     enabled: bool = True
     severity_threshold: str = "medium"
-    custom_rules: Optional[Dict[str, Any]] = None
+    custom_rules: Any = None
 
 
 class AnalysisConfig(BaseModel):
     """Analysis configuration"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     security_checks: List[SecurityCheckConfig] = Field(default_factory=list)
     performance_analysis: bool = False
     compliance_check: bool = False
@@ -102,15 +133,19 @@ class AnalysisConfig(BaseModel):
 
 class BulkAnalysisRequest(BaseModel):
     """Request for analyzing multiple endpoints"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     endpoints: List[str] = Field(..., description="List of endpoints to analyze")
     config: Optional[AnalysisConfig] = None
 
 
 class BulkAnalysisResponse(BaseModel):
     """Response for bulk analysis"""
-    request_id: str = Field(default_factory=lambda: str(uuid4()))
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
+    request_id: str = Field(default_factory=lambda: uuid4().hex)
     total_endpoints: int
     completed: int = 0
     failed: int = 0
     results: List[ApiAnalysisEntity] = Field(default_factory=list)
-    status: str = "processing"  # processing, completed, failed
\ No newline at end of file
+    status: BulkStatus = "processing"
\ No newline at end of file
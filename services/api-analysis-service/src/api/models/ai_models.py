@@ -4,10 +4,12 @@ Data structures for AI analysis and integration
 """
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, Literal, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
+from src.core.clock import cached_utcnow
+
 
 class AIAnalysisType(str, Enum):
     """AI analysis types"""
@@ -27,27 +29,35 @@ class AIServiceStatus(str, Enum):
     DISABLED = "disabled"
 
 
+# Literal counterpart of AIServiceStatus for model fields; validates faster than Enum
+AIServiceStatusLiteral = Literal["healthy", "degraded", "unhealthy", "disabled"]
+
+
 class AIAnalysisResult(BaseModel):
     """AI-enhanced analysis result"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     analysis_id: str
     endpoint: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     ai_enhanced: bool = True
     confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
-    ai_insights: List[str] = Field(default_factory=list)
-    risk_assessment: Optional[Dict[str, Any]] = None
+    ai_insights: Tuple[str, ...] = ()
+    risk_assessment: Any = None
     compliance_score: Optional[float] = Field(None, ge=0.0, le=1.0)
-    context_analysis: Optional[Dict[str, Any]] = None
-    recommendations: List[str] = Field(default_factory=list)
+    context_analysis: Any = None
+    recommendations: Tuple[str, ...] = ()
     model_used: Optional[str] = None
     processing_time_ms: Optional[float] = None
 
 
 class AIServiceHealth(BaseModel):
     """AI service health status"""
-    status: AIServiceStatus
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
+    status: AIServiceStatusLiteral
     service: str = "ai-analysis"
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=cached_utcnow)
     version: str = "1.0.0"
     model_loaded: bool = False
     current_model: Optional[str] = None
@@ -60,6 +70,8 @@ class AIServiceHealth(BaseModel):
 
 class AIConfiguration(BaseModel):
     """AI service configuration"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     enabled: bool
     model: str
     temperature: float = 0.1
@@ -73,6 +85,8 @@ class AIConfiguration(BaseModel):
 
 class AIStatistics(BaseModel):
     """AI service statistics"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
     total_requests: int
     successful_requests: int
     failed_requests: int
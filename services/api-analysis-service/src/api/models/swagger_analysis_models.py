@@ -2,11 +2,15 @@
 Pydantic модели для анализа Swagger/OpenAPI спецификаций
 """
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, TypeAdapter, field_validator
+from pydantic.dataclasses import dataclass
 from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
 
+# Конфигурация для неизменяемых dataclass-моделей без логики валидации
+_LEAF_CONFIG = ConfigDict(extra="ignore", validate_assignment=False)
+
 class AnalysisStatus(str, Enum):
     """Статус анализа"""
     PENDING = "pending"
@@ -31,14 +35,30 @@ class SecurityIssueType(str, Enum):
     RATE_LIMITING = "rate_limiting"
     CONFIGURATION = "configuration"
 
+# Значения SeverityLevel для полей моделей: Literal валидируется быстрее Enum
+SeverityLiteral = Literal["critical", "high", "medium", "low", "info"]
+
+# URL проверяется один раз при разборе запроса, дальше хранится обычной строкой
+_HTTP_URL = TypeAdapter(HttpUrl)
+
+def _validate_http_url(value: str) -> str:
+    return str(_HTTP_URL.validate_python(value))
+
 class SwaggerAnalysisRequest(BaseModel):
     """Запрос на анализ Swagger спецификации"""
-    swagger_url: HttpUrl = Field(..., description="URL к swagger.json или swagger.yaml файлу")
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
+    swagger_url: str = Field(..., description="URL к swagger.json или swagger.yaml файлу")
     timeout: Optional[int] = Field(default=30, description="Таймаут запроса в секундах")
     enable_ai_analysis: Optional[bool] = Field(default=True, description="Включить AI анализ через OpenRouter")
 
+    @field_validator("swagger_url")
+    @classmethod
+    def _check_swagger_url(cls, value: str) -> str:
+        return _validate_http_url(value)
+
 class EndpointInfo(BaseModel):
     """Информация об эндпоинте"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     method: str = Field(..., description="HTTP метод (GET, POST, etc.)")
     path: str = Field(..., description="Путь к эндпоинту")
     summary: Optional[str] = Field(None, description="Краткое описание")
@@ -46,20 +66,22 @@ class EndpointInfo(BaseModel):
     operation_id: Optional[str] = Field(None, description="Уникальный идентификатор операции")
     tags: List[str] = Field(default_factory=list, description="Теги эндпоинта")
     deprecated: bool = Field(default=False, description="Устаревший эндпоинт")
-    security: List[Dict[str, Any]] = Field(default_factory=list, description="Требования безопасности")
-    parameters: List[Dict[str, Any]] = Field(default_factory=list, description="Параметры эндпоинта")
+    security: List[Any] = Field(default_factory=list, description="Требования безопасности")
+    parameters: List[Any] = Field(default_factory=list, description="Параметры эндпоинта")
 
 class APIMetadata(BaseModel):
     """Метаданные API"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     title: str = Field(..., description="Название API")
     version: str = Field(..., description="Версия API")
     description: Optional[str] = Field(None, description="Описание API")
     openapi_version: str = Field(..., description="Версия OpenAPI")
-    contact: Dict[str, Any] = Field(default_factory=dict, description="Информация о контакте")
-    license: Dict[str, Any] = Field(default_factory=dict, description="Лицензия")
+    contact: Any = Field(default_factory=dict, description="Информация о контакте")
+    license: Any = Field(default_factory=dict, description="Лицензия")
     terms_of_service: Optional[str] = Field(None, description="Условия использования")
 
-class SecurityScheme(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class SecurityScheme:
     """Схема безопасности"""
     type: str = Field(..., description="Тип схемы безопасности")
     description: Optional[str] = Field(None, description="Описание схемы")
@@ -68,7 +90,8 @@ class SecurityScheme(BaseModel):
     scheme: Optional[str] = Field(None, description="Схема HTTP аутентификации")
     bearer_format: Optional[str] = Field(None, description="Формат bearer токена")
 
-class APIStatistics(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class APIStatistics:
     """Статистика API"""
     total_endpoints: int = Field(..., description="Общее количество эндпоинтов")
     paths_count: int = Field(..., description="Количество путей")
@@ -79,7 +102,8 @@ class APIStatistics(BaseModel):
     patch_endpoints: int = Field(..., description="Количество PATCH эндпоинтов")
     schemas_count: int = Field(..., description="Количество схем данных")
 
-class EndpointsSummary(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class EndpointsSummary:
     """Сводка эндпоинтов"""
     total_count: int = Field(..., description="Общее количество эндпоинтов")
     methods: Dict[str, int] = Field(..., description="Количество по методам")
@@ -90,6 +114,7 @@ class EndpointsSummary(BaseModel):
 
 class SecurityAssessment(BaseModel):
     """Оценка безопасности"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     has_authentication: bool = Field(..., description="Есть аутентификация")
     global_security_defined: bool = Field(..., description="Определена глобальная безопасность")
     unprotected_endpoints: List[str] = Field(default_factory=list, description="Незащищенные эндпоинты")
@@ -98,6 +123,7 @@ class SecurityAssessment(BaseModel):
 
 class ValidationResult(BaseModel):
     """Результат валидации"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     is_valid: bool = Field(..., description="Валидна ли спецификация")
     errors: List[str] = Field(default_factory=list, description="Ошибки валидации")
     warnings: List[str] = Field(default_factory=list, description="Предупреждения")
@@ -105,6 +131,7 @@ class ValidationResult(BaseModel):
 
 class StructureAnalysis(BaseModel):
     """Структурный анализ"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     summary: EndpointsSummary = Field(..., description="Сводка эндпоинтов")
     security_assessment: SecurityAssessment = Field(..., description="Оценка безопасности")
     validation_check: ValidationResult = Field(..., description="Результат валидации")
@@ -112,13 +139,15 @@ class StructureAnalysis(BaseModel):
 
 class PotentialIssue(BaseModel):
     """Потенциальная проблема"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     category: str = Field(..., description="Категория проблемы")
     description: str = Field(..., description="Описание проблемы")
     endpoint: Optional[str] = Field(None, description="Связанный эндпоинт")
-    severity: SeverityLevel = Field(..., description="Серьезность проблемы")
+    severity: SeverityLiteral = Field(..., description="Серьезность проблемы")
 
 class AIAnalysisResult(BaseModel):
     """Результат AI анализа"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     success: bool = Field(..., description="Успешность AI анализа")
     analysis: Optional[str] = Field(None, description="Результат анализа от AI")
     model: Optional[str] = Field(None, description="Использованная модель")
@@ -127,6 +156,7 @@ class AIAnalysisResult(BaseModel):
 
 class AnalysisSummary(BaseModel):
     """Краткая сводка анализа"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     api_title: str = Field(..., description="Название API")
     total_endpoints: int = Field(..., description="Общее количество эндпоинтов")
     security_score: int = Field(..., description="Оценка безопасности (0-100)")
@@ -138,12 +168,14 @@ class AnalysisSummary(BaseModel):
 
 class Recommendation(BaseModel):
     """Рекомендация"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     category: str = Field(..., description="Категория рекомендации")
     priority: Literal["Critical", "High", "Medium", "Low"] = Field(..., description="Приоритет")
     description: str = Field(..., description="Описание рекомендации")
 
 class SwaggerAnalysisResponse(BaseModel):
     """Ответ на анализ Swagger"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     success: bool = Field(..., description="Успешность анализа")
     analysis_id: str = Field(..., description="Уникальный идентификатор анализа")
     timestamp: datetime = Field(..., description="Время анализа")
@@ -159,29 +191,51 @@ class SwaggerAnalysisResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Ответ с ошибкой"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     success: bool = Field(default=False, description="Успешность")
     error: str = Field(..., description="Описание ошибки")
     details: Optional[str] = Field(None, description="Подробности ошибки")
     timestamp: datetime = Field(default_factory=datetime.now, description="Время ошибки")
 
-class HealthCheckResponse(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True, config=_LEAF_CONFIG)
+class HealthCheckResponse:
     """Ответ на проверку здоровья"""
     status: Literal["healthy", "unhealthy"] = Field(..., description="Статус сервиса")
     timestamp: datetime = Field(..., description="Время проверки")
     service: str = Field(default="swagger-analysis-service", description="Название сервиса")
     version: str = Field(default="1.0.0", description="Версия сервиса")
     dependencies: Dict[str, str] = Field(default_factory=dict, description="Статус зависимостей")
+    cache: Dict[str, int] = Field(default_factory=dict, description="Счетчики попаданий и промахов кэшей")
 
 class BatchAnalysisRequest(BaseModel):
     """Запрос на пакетный анализ"""
-    swagger_urls: List[HttpUrl] = Field(..., description="Список URL для анализа")
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
+    swagger_urls: List[str] = Field(..., description="Список URL для анализа")
     enable_ai_analysis: Optional[bool] = Field(default=True, description="Включить AI анализ")
 
+    @field_validator("swagger_urls")
+    @classmethod
+    def _check_swagger_urls(cls, value: List[str]) -> List[str]:
+        return [_validate_http_url(url) for url in value]
+
 class BatchAnalysisResponse(BaseModel):
     """Ответ на пакетный анализ"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, defer_build=True)
     batch_id: str = Field(..., description="Идентификатор пакета")
     total_requests: int = Field(..., description="Общее количество запросов")
     successful_analyses: int = Field(..., description="Количество успешных анализов")
     failed_analyses: int = Field(..., description="Количество неудачных анализов")
     results: List[SwaggerAnalysisResponse] = Field(default_factory=list, description="Результаты анализа")
-    errors: List[ErrorResponse] = Field(default_factory=list, description="Ошибки")
\ No newline at end of file
+    errors: List[ErrorResponse] = Field(default_factory=list, description="Ошибки")
+
+
+def rebuild_deferred_models() -> None:
+    """Достраивает схемы всех моделей модуля с defer_build (вызывается при старте приложения)"""
+    for model in list(globals().values()):
+        if (
+            isinstance(model, type)
+            and issubclass(model, BaseModel)
+            and model.__module__ == __name__
+            and not model.__pydantic_complete__
+        ):
+            model.model_rebuild()
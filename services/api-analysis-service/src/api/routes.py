@@ -2,11 +2,16 @@
 API routes for API Analysis Service
 """
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
 from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
 
 from src.api.models import (
     AnalysisRequest,
@@ -18,25 +23,56 @@ from src.api.models import (
     HealthStatus,
 )
 from src.services.analysis_service import AnalysisService
+from src.core.clock import cached_utcnow
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Create router
-api_router = APIRouter()
+_URL_PREFIXES = ("http://", "https://")
+_SCHEME_RE = re.compile(r"^https?://")
+# Settings are read once at import; they don't change while the process runs
+_MAX_ENDPOINT_LEN: int = int(settings.MAX_ENDPOINT_LENGTH)
+_SERVICE_VERSION: str = str(settings.SERVICE_VERSION)
+
+# Built once; returning raw JSON bytes skips response_model validation and the dict round-trip
+_HISTORY_ADAPTER = TypeAdapter(AnalysisHistory)
+_BULK_ADAPTER = TypeAdapter(BulkAnalysisResponse)
+
+# Recent /analyze results keyed by (endpoint, analysis_type, include_performance).
+# All current analysis types are read-only probes, so every request is cacheable.
+_ANALYZE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# Backend calls currently running; concurrent requests for the same key await one task
+_INFLIGHT: Dict[Tuple[Any, ...], asyncio.Future] = {}
+
+# Health body is static except for the timestamp; field order matches HealthStatus
+_HEALTH_PREFIX = b'{"status":"healthy","service":"api-analysis","timestamp":"'
+_HEALTH_SUFFIX = b'","version":' + orjson.dumps(_SERVICE_VERSION) + b'}'
+
+async def _single_flight(key: Tuple[Any, ...], call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run call() once per key no matter how many requests are waiting on it"""
+    future = _INFLIGHT.get(key)
+    if future is None:
+        future = asyncio.ensure_future(call())
+        _INFLIGHT[key] = future
+        future.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    # Shielded so one disconnecting client doesn't cancel the shared call
+    return await asyncio.shield(future)
+
 
 # Analysis service instance
 analysis_service = AnalysisService()
 
+# Create router; the service's probe session is closed when the app mounting it shuts down
+api_router = APIRouter(on_shutdown=[analysis_service.aclose])
+
 
 @api_router.get("/health", response_model=HealthStatus)
 async def health_check():
     """Health check endpoint"""
-    return HealthStatus(
-        status="healthy",
-        service="api-analysis",
-        timestamp=datetime.utcnow(),
-        version=settings.SERVICE_VERSION
+    return Response(
+        content=_HEALTH_PREFIX + cached_utcnow().isoformat().encode() + _HEALTH_SUFFIX,
+        media_type="application/json"
     )
 
 
@@ -49,24 +85,32 @@ async def analyze_endpoint(request: AnalysisRequest):
         logger.info(f"Analyzing endpoint: {request.endpoint}")
         
         # Validate endpoint
-        if not request.endpoint.startswith(('http://', 'https://')):
+        if not request.endpoint.startswith(_URL_PREFIXES):
             raise HTTPException(
                 status_code=400,
                 detail="Endpoint must start with http:// or https://"
             )
         
-        if len(request.endpoint) > settings.MAX_ENDPOINT_LENGTH:
+        if len(request.endpoint) > _MAX_ENDPOINT_LEN:
             raise HTTPException(
                 status_code=400,
-                detail=f"Endpoint too long. Maximum length is {settings.MAX_ENDPOINT_LENGTH}"
+                detail=f"Endpoint too long. Maximum length is {_MAX_ENDPOINT_LEN}"
             )
         
-        # Perform analysis
-        analysis_result = await analysis_service.analyze_endpoint(
-            endpoint=request.endpoint,
-            analysis_type=request.analysis_type,
-            include_performance=request.include_performance
-        )
+        key = (request.endpoint, request.analysis_type, bool(request.include_performance))
+        analysis_result = None if request.force_refresh else _ANALYZE_CACHE.get(key)
+        
+        if analysis_result is None:
+            # Perform analysis
+            analysis_result = await _single_flight(
+                ("analyze",) + key,
+                lambda: analysis_service.analyze_endpoint(
+                    endpoint=request.endpoint,
+                    analysis_type=request.analysis_type,
+                    include_performance=request.include_performance
+                )
+            )
+            _ANALYZE_CACHE[key] = analysis_result
         
         return AnalysisResponse(
             success=True,
@@ -87,7 +131,10 @@ async def analyze_endpoint(request: AnalysisRequest):
 async def get_analysis(analysis_id: str):
     """Get a specific analysis by ID"""
     try:
-        analysis = await analysis_service.get_analysis(analysis_id)
+        analysis = await _single_flight(
+            ("analysis", analysis_id),
+            lambda: analysis_service.get_analysis(analysis_id)
+        )
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
         return analysis
@@ -111,7 +158,7 @@ async def get_analysis_history(
             per_page=per_page,
             endpoint_filter=endpoint_filter
         )
-        return history
+        return Response(content=_HISTORY_ADAPTER.dump_json(history), media_type="application/json")
     except Exception as e:
         logger.error(f"Error retrieving analysis history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -143,13 +190,21 @@ async def analyze_endpoints_bulk(
     try:
         logger.info(f"Starting bulk analysis for {len(request.endpoints)} endpoints")
         
-        # Validate endpoints
-        for endpoint in request.endpoints:
-            if not endpoint.startswith(('http://', 'https://')):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid endpoint: {endpoint}. Must start with http:// or https://"
-                )
+        # Validate endpoints in one pass and report every bad one at once
+        match = _SCHEME_RE.match
+        invalid = [endpoint for endpoint in request.endpoints if not match(endpoint)]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid endpoints: {', '.join(invalid)}. Must start with http:// or https://"
+            )
+        
+        max_len = _MAX_ENDPOINT_LEN
+        if any(len(endpoint) > max_len for endpoint in request.endpoints):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Endpoint too long. Maximum length is {max_len}"
+            )
         
         # Start background analysis
         bulk_response = await analysis_service.start_bulk_analysis(request)
@@ -174,10 +229,13 @@ async def analyze_endpoints_bulk(
 async def get_bulk_analysis_status(request_id: str):
     """Get status of bulk analysis"""
     try:
-        bulk_response = await analysis_service.get_bulk_analysis_status(request_id)
+        bulk_response = await _single_flight(
+            ("bulk", request_id),
+            lambda: analysis_service.get_bulk_analysis_status(request_id)
+        )
         if not bulk_response:
             raise HTTPException(status_code=404, detail="Bulk analysis request not found")
-        return bulk_response
+        return Response(content=_BULK_ADAPTER.dump_json(bulk_response), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -4,9 +4,9 @@ Delegates business logic to AIController
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Query
-from src.api.controllers.ai_controller import AIController
-from src.api.models.ai_models import AIAnalysisType
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from src.api.controllers.ai_controller import AIController, get_ai_controller
+from src.api.models.ai_models import AIAnalysisType, AIStatistics
 from src.api.models.request_models import AITestRequest, CacheClearRequest
 
 logger = logging.getLogger(__name__)
@@ -14,34 +14,39 @@ logger = logging.getLogger(__name__)
 # Router
 ai_router = APIRouter(prefix="/ai", tags=["ai"])
 
-# Controller instance
-ai_controller = AIController()
+
+async def _ai_controller() -> AIController:
+    # async so FastAPI resolves it inline instead of in the thread pool
+    return get_ai_controller()
 
 
 @ai_router.get("/health")
-async def get_ai_service_health():
+async def get_ai_service_health(ai_controller: AIController = Depends(_ai_controller)):
     """Get AI service health status"""
     try:
         ai_health = await ai_controller.get_ai_service_health()
-        return ai_health.dict()
+        return ai_health
     except Exception as e:
         logger.error(f"Error retrieving AI service health: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@ai_router.get("/stats")
-async def get_ai_statistics():
+@ai_router.get("/stats", response_model=AIStatistics)
+async def get_ai_statistics(ai_controller: AIController = Depends(_ai_controller)):
     """Get AI service statistics"""
     try:
         ai_stats = await ai_controller.get_ai_statistics()
-        return ai_stats.dict()
+        return Response(content=ai_stats.model_dump_json(), media_type="application/json")
     except Exception as e:
         logger.error(f"Error retrieving AI statistics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @ai_router.post("/cache/clear")
-async def clear_ai_cache(cache_type: str = Query("ai", description="Type of cache to clear")):
+async def clear_ai_cache(
+    cache_type: str = Query("ai", description="Type of cache to clear"),
+    ai_controller: AIController = Depends(_ai_controller)
+):
     """Clear AI analysis cache"""
     try:
         request = CacheClearRequest(cache_type=cache_type)
@@ -53,10 +58,10 @@ async def clear_ai_cache(cache_type: str = Query("ai", description="Type of cach
 
 
 @ai_router.get("/models")
-async def get_available_models():
+def get_available_models(ai_controller: AIController = Depends(_ai_controller)):
     """Get list of available AI models"""
     try:
-        models = await ai_controller.get_available_models()
+        models = ai_controller.get_available_models()
         return models
     except Exception as e:
         logger.error(f"Error retrieving AI models: {str(e)}")
@@ -64,7 +69,10 @@ async def get_available_models():
 
 
 @ai_router.post("/test")
-async def test_ai_integration(test_endpoint: str = None):
+async def test_ai_integration(
+    test_endpoint: str = None,
+    ai_controller: AIController = Depends(_ai_controller)
+):
     """Test AI integration with a sample analysis"""
     try:
         request = AITestRequest(test_endpoint=test_endpoint)
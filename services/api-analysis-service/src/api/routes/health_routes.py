@@ -4,8 +4,8 @@ Delegates business logic to HealthController
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Query
-from src.api.controllers.health_controller import HealthController
+from fastapi import APIRouter, Depends, HTTPException, Query
+from src.api.controllers.health_controller import HealthController, get_health_controller
 from src.api.models.response_models import HealthStatus
 
 logger = logging.getLogger(__name__)
@@ -13,12 +13,17 @@ logger = logging.getLogger(__name__)
 # Router
 health_router = APIRouter(prefix="/health", tags=["health"])
 
-# Controller instance
-health_controller = HealthController()
+
+async def _health_controller() -> HealthController:
+    # async so FastAPI resolves it inline instead of in the thread pool
+    return get_health_controller()
 
 
 @health_router.get("/", response_model=HealthStatus)
-async def get_health_status(include_ai_status: bool = Query(False, description="Include AI service status")):
+async def get_health_status(
+    include_ai_status: bool = Query(False, description="Include AI service status"),
+    health_controller: HealthController = Depends(_health_controller)
+):
     """Enhanced health check endpoint with AI status"""
     try:
         health_status = await health_controller.get_health_status(include_ai_status)
@@ -29,7 +34,7 @@ async def get_health_status(include_ai_status: bool = Query(False, description="
 
 
 @health_router.get("/detailed")
-async def get_detailed_health_status():
+async def get_detailed_health_status(health_controller: HealthController = Depends(_health_controller)):
     """Get detailed health status with component checks"""
     try:
         health_status = await health_controller.get_detailed_health_status()
@@ -40,7 +45,7 @@ async def get_detailed_health_status():
 
 
 @health_router.get("/statistics")
-async def get_service_statistics():
+async def get_service_statistics(health_controller: HealthController = Depends(_health_controller)):
     """Get service statistics and metrics"""
     try:
         stats = await health_controller.get_service_statistics()
@@ -51,7 +56,7 @@ async def get_service_statistics():
 
 
 @health_router.get("/dependencies")
-async def check_external_dependencies():
+async def check_external_dependencies(health_controller: HealthController = Depends(_health_controller)):
     """Check health of external dependencies"""
     try:
         deps = await health_controller.check_external_dependencies()
@@ -2,27 +2,64 @@
 Маршруты для анализа Swagger/OpenAPI спецификаций
 """
 
+import asyncio
 import logging
+import re
+from concurrent.futures import Executor
+
+import aiohttp
+import httpx
+import orjson
+import yaml
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from typing import List, Dict, Any, Optional
 
 from ..controllers.swagger_analysis_controller import SwaggerAnalysisController
+from ...core.config import settings
+from ...core.executors import get_parse_executor
+from ...core.http_client import get_batch_session, get_http_client
+from ...services.spec_validation_cache import spec_validation_cache
 from ..models.swagger_analysis_models import (
     SwaggerAnalysisRequest,
+    SwaggerAnalysisResponse,
     BatchAnalysisRequest,
     HealthCheckResponse
 )
 
+# C-загрузчик libyaml примерно на порядок быстрее чистого Python; используем его, если доступен
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
+# Верхняя граница размера загружаемой спецификации, чтобы огромный ответ не исчерпал память
+_MAX_SPEC_BYTES = settings.MAX_SPEC_BYTES
+_DOWNLOAD_CHUNK_SIZE = 65536
+
+# YAML больше этого размера разбирается в пуле потоков приложения (app.state.parse_executor),
+# чтобы не блокировать event loop
+_YAML_THREAD_THRESHOLD = 256_000
+
+# Допустимые Content-Type спецификации; одна проверка регулярным выражением вместо трех поисков подстроки
+_CT_RE = re.compile(r"json|ya?ml")
+
+# Справочные ответы не меняются до перезапуска сервиса, их можно кэшировать на стороне клиента
+_STATIC_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600, immutable"}
+
 # Создаем роутер
-router = APIRouter(prefix="/api/v1/swagger-analysis", tags=["Swagger Analysis"])
+router = APIRouter(
+    prefix="/api/v1/swagger-analysis",
+    tags=["Swagger Analysis"],
+    default_response_class=ORJSONResponse
+)
 
 # Инициализируем контроллер
 controller = SwaggerAnalysisController()
 
-@router.post("/analyze", response_model=Dict[str, Any], summary="Анализ Swagger спецификации")
+@router.post("/analyze", response_model=SwaggerAnalysisResponse, summary="Анализ Swagger спецификации")
 async def analyze_swagger_specification(request: SwaggerAnalysisRequest):
     """
     Анализирует Swagger/OpenAPI спецификацию по URL.
@@ -43,16 +80,19 @@ async def analyze_swagger_specification(request: SwaggerAnalysisRequest):
     ```
     """
     try:
-        result = await controller.analyze_swagger(request)
-        return result.dict()
+        # Модель сериализуется один раз через response_model, без промежуточного dict
+        return await controller.analyze_swagger(request)
     except HTTPException as e:
         raise e
-    except Exception as e:
-        logger.error(f"Неожиданная ошибка в analyze_swagger_specification: {e}")
-        raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
+    except Exception:
+        logger.exception("Неожиданная ошибка в analyze_swagger_specification")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 @router.post("/batch-analyze", response_model=Dict[str, Any], summary="Пакетный анализ")
-async def batch_analyze_swagger_specifications(request: BatchAnalysisRequest):
+async def batch_analyze_swagger_specifications(
+    request: BatchAnalysisRequest,
+    session: aiohttp.ClientSession = Depends(get_batch_session)
+):
     """
     Выполняет пакетный анализ нескольких Swagger спецификаций параллельно.
     
@@ -70,11 +110,11 @@ async def batch_analyze_swagger_specifications(request: BatchAnalysisRequest):
     ```
     """
     try:
-        result = await controller.batch_analyze_swagger(request)
+        result = await controller.batch_analyze_swagger(request, session)
         return result
-    except Exception as e:
-        logger.error(f"Ошибка в batch_analyze_swagger_specifications: {e}")
-        raise HTTPException(status_code=500, detail=f"Ошибка пакетного анализа: {str(e)}")
+    except Exception:
+        logger.exception("Ошибка в batch_analyze_swagger_specifications")
+        raise HTTPException(status_code=500, detail="Ошибка пакетного анализа")
 
 @router.get("/analysis/{analysis_id}", response_model=Dict[str, Any], summary="Статус анализа")
 async def get_analysis_status(analysis_id: str):
@@ -86,9 +126,9 @@ async def get_analysis_status(analysis_id: str):
     try:
         result = await controller.get_analysis_status(analysis_id)
         return result
-    except Exception as e:
-        logger.error(f"Ошибка в get_analysis_status: {e}")
-        raise HTTPException(status_code=500, detail=f"Ошибка получения статуса: {str(e)}")
+    except Exception:
+        logger.exception("Ошибка в get_analysis_status")
+        raise HTTPException(status_code=500, detail="Ошибка получения статуса")
 
 @router.get("/health", response_model=HealthCheckResponse, summary="Проверка здоровья")
 async def health_check():
@@ -104,7 +144,7 @@ async def health_check():
         result = await controller.get_health_check()
         return result
     except Exception as e:
-        logger.error(f"Ошибка в health_check: {e}")
+        logger.exception("Ошибка в health_check")
         # Возвращаем базовый ответ о проблеме со здоровьем
         return HealthCheckResponse(
             status="unhealthy",
@@ -125,9 +165,41 @@ async def get_supported_formats():
     try:
         result = await controller.get_supported_formats()
         return result
-    except Exception as e:
-        logger.error(f"Ошибка в get_supported_formats: {e}")
-        raise HTTPException(status_code=500, detail=f"Ошибка получения информации о форматах: {str(e)}")
+    except Exception:
+        logger.exception("Ошибка в get_supported_formats")
+        raise HTTPException(status_code=500, detail="Ошибка получения информации о форматах")
+
+# Статичный ответ, сериализуется один раз при импорте
+_TEST_ENDPOINTS_JSON = orjson.dumps({
+    "vulnerable_api": {
+        "url": "http://localhost:8002/docs",
+        "description": "Тестовый уязвимый API для демонстрации анализа",
+        "endpoints": [
+            {"method": "GET", "path": "/admin", "description": "Незащищенная админ панель"},
+            {"method": "GET", "path": "/admin/config", "description": "Раскрытие секретов"},
+            {"method": "GET", "path": "/api/v1/users", "description": "SQL injection уязвимости"},
+            {"method": "GET", "path": "/api/v1/payments", "description": "Критическая утечка данных"}
+        ]
+    },
+    "valid_apis": [
+        {
+            "url": "https://petstore3.swagger.io/api/v3/openapi.json",
+            "description": "Пример валидной OpenAPI спецификации"
+        }
+    ],
+    "test_scenarios": [
+        {
+            "name": "Анализ уязвимого API",
+            "url": "http://localhost:8002/docs",
+            "expected_issues": ["authentication", "data_exposure", "configuration"]
+        },
+        {
+            "name": "Анализ валидного API", 
+            "url": "https://petstore3.swagger.io/api/v3/openapi.json",
+            "expected_issues": []
+        }
+    ]
+})
 
 @router.get("/test-endpoints", response_model=Dict[str, Any], summary="Тестовые эндпоинты")
 async def get_test_endpoints():
@@ -139,41 +211,73 @@ async def get_test_endpoints():
     - Примеры валидных OpenAPI спецификаций
     - Различные сценарии тестирования
     """
+    return Response(content=_TEST_ENDPOINTS_JSON, media_type="application/json", headers=_STATIC_CACHE_HEADERS)
+
+def _load_yaml(data: bytes) -> Any:
+    """Разбирает YAML безопасным загрузчиком"""
+    return yaml.load(data, Loader=_YamlLoader)
+
+async def _validate_spec_body(
+    body: bytearray, content_type: str, url: str, parse_executor: Executor
+) -> Dict[str, Any]:
+    """
+    Формирует вердикт валидации; одинаковые спецификации с разных URL разбираются один раз.
+    Сбои, не связанные с содержимым спецификации, пробрасываются и не попадают в кэш
+    """
+    as_json = "json" in content_type or url.endswith(".json")
+    key = (as_json, spec_validation_cache.content_key(body))
+    
+    summary = await spec_validation_cache.get_summary(key)
+    if summary is None:
+        summary = await _summarize_spec(body, as_json, parse_executor)
+        await spec_validation_cache.store_summary(key, summary)
+    
+    if summary["valid"]:
+        return {**summary, "url": url, "content_type": content_type}
+    return {**summary, "url": url}
+
+async def _summarize_spec(body: bytearray, as_json: bool, parse_executor: Executor) -> Dict[str, Any]:
+    """
+    Разбирает спецификацию и возвращает результат проверки без привязки к URL.
+    Результат зависит только от содержимого; прочие ошибки (например, остановленный пул потоков)
+    пробрасываются, чтобы их не закэшировали как вердикт
+    """
+    try:
+        if as_json:
+            # orjson достаточно быстр, чтобы разбирать прямо в event loop
+            spec = orjson.loads(body)
+        elif len(body) > _YAML_THREAD_THRESHOLD:
+            spec = await asyncio.get_running_loop().run_in_executor(
+                parse_executor, _load_yaml, bytes(body)
+            )
+        else:
+            spec = _load_yaml(bytes(body))
+    except (orjson.JSONDecodeError, yaml.YAMLError) as e:
+        return {
+            "valid": False,
+            "error": f"Ошибка парсинга: {str(e)}"
+        }
+    
+    # Базовая проверка на наличие OpenAPI версии
+    if not isinstance(spec, dict) or "openapi" not in spec:
+        return {
+            "valid": False,
+            "error": "Отсутствует поле 'openapi'"
+        }
+    
+    info = spec.get("info")
     return {
-        "vulnerable_api": {
-            "url": "http://localhost:8002/docs",
-            "description": "Тестовый уязвимый API для демонстрации анализа",
-            "endpoints": [
-                {"method": "GET", "path": "/admin", "description": "Незащищенная админ панель"},
-                {"method": "GET", "path": "/admin/config", "description": "Раскрытие секретов"},
-                {"method": "GET", "path": "/api/v1/users", "description": "SQL injection уязвимости"},
-                {"method": "GET", "path": "/api/v1/payments", "description": "Критическая утечка данных"}
-            ]
-        },
-        "valid_apis": [
-            {
-                "url": "https://petstore3.swagger.io/api/v3/openapi.json",
-                "description": "Пример валидной OpenAPI спецификации"
-            }
-        ],
-        "test_scenarios": [
-            {
-                "name": "Анализ уязвимого API",
-                "url": "http://localhost:8002/docs",
-                "expected_issues": ["authentication", "data_exposure", "configuration"]
-            },
-            {
-                "name": "Анализ валидного API", 
-                "url": "https://petstore3.swagger.io/api/v3/openapi.json",
-                "expected_issues": []
-            }
-        ]
+        "valid": True,
+        "openapi_version": spec.get("openapi"),
+        "title": info.get("title", "Unknown") if isinstance(info, dict) else "Unknown"
     }
 
 @router.post("/validate-url", response_model=Dict[str, Any], summary="Валидация URL")
 async def validate_swagger_url(
     url: str = Query(..., description="URL для проверки"),
-    timeout: int = Query(10, description="Таймаут проверки в секундах")
+    timeout: int = Query(10, description="Таймаут проверки в секундах"),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    parse_executor: Executor = Depends(get_parse_executor)
 ):
     """
     Проверяет доступность и корректность Swagger URL.
@@ -184,10 +288,14 @@ async def validate_swagger_url(
     - Валидность JSON/YAML
     """
     try:
-        import httpx
+        # Условный запрос: если спецификация не менялась, сервер ответит 304 без тела
+        conditional_headers, cached_verdict = await spec_validation_cache.lookup(url)
         
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.get(url)
+        async with client.stream("GET", url, headers=conditional_headers, timeout=timeout) as response:
+            logger.debug("validate-url %s: %s %s", url, response.http_version, response.status_code)
+            if response.status_code == 304 and cached_verdict is not None:
+                spec_validation_cache.record_hit()
+                return cached_verdict
             
             # Проверяем статус код
             if response.status_code != 200:
@@ -199,44 +307,45 @@ async def validate_swagger_url(
             
             # Проверяем Content-Type
             content_type = response.headers.get("content-type", "").lower()
-            if not any(fmt in content_type for fmt in ["json", "yaml", "yml"]):
+            if not _CT_RE.search(content_type):
                 return {
                     "valid": False,
                     "error": f"Неподдерживаемый Content-Type: {content_type}",
                     "url": url
                 }
             
-            # Пытаемся распарсить содержимое
-            try:
-                if "json" in content_type or url.endswith(".json"):
-                    spec = response.json()
-                else:
-                    import yaml
-                    spec = yaml.safe_load(response.text)
-                
-                # Базовая проверка на наличие OpenAPI версии
-                if "openapi" not in spec:
-                    return {
-                        "valid": False,
-                        "error": "Отсутствует поле 'openapi'",
-                        "url": url
-                    }
-                
-                return {
-                    "valid": True,
-                    "openapi_version": spec.get("openapi"),
-                    "title": spec.get("info", {}).get("title", "Unknown"),
-                    "url": url,
-                    "content_type": content_type
-                }
-                
-            except Exception as e:
-                return {
-                    "valid": False,
-                    "error": f"Ошибка парсинга: {str(e)}",
-                    "url": url
-                }
-                
+            # Читаем тело частями и прерываемся, как только превышен лимит
+            too_large = {
+                "valid": False,
+                "error": f"Спецификация превышает {_MAX_SPEC_BYTES} байт",
+                "url": url
+            }
+            content_length = response.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > _MAX_SPEC_BYTES:
+                return too_large
+            
+            body = bytearray()
+            async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                body += chunk
+                if len(body) > _MAX_SPEC_BYTES:
+                    return too_large
+            
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+        
+        try:
+            verdict = await _validate_spec_body(body, content_type, url, parse_executor)
+        except Exception as e:
+            # Сбой инфраструктуры, а не свойство спецификации: отвечаем, но ничего не кэшируем
+            logger.warning("validate-url %s: разбор не выполнен: %s", url, e)
+            return {
+                "valid": False,
+                "error": f"Ошибка парсинга: {str(e)}",
+                "url": url
+            }
+        await spec_validation_cache.store(url, etag, last_modified, verdict)
+        return verdict
+            
     except httpx.TimeoutException:
         return {
             "valid": False,
@@ -250,6 +359,56 @@ async def validate_swagger_url(
             "url": url
         }
 
+# Статичный ответ, сериализуется один раз при импорте
+_REQUEST_EXAMPLES_JSON = orjson.dumps({
+    "single_analysis": {
+        "description": "Анализ одной спецификации",
+        "method": "POST",
+        "endpoint": "/api/v1/swagger-analysis/analyze",
+        "body": {
+            "swagger_url": "http://localhost:8002/docs",
+            "timeout": 30,
+            "enable_ai_analysis": True
+        }
+    },
+    "batch_analysis": {
+        "description": "Пакетный анализ нескольких API",
+        "method": "POST", 
+        "endpoint": "/api/v1/swagger-analysis/batch-analyze",
+        "body": {
+            "swagger_urls": [
+                "http://localhost:8002/docs",
+                "https://petstore3.swagger.io/api/v3/openapi.json"
+            ],
+            "enable_ai_analysis": True
+        }
+    },
+    "url_validation": {
+        "description": "Валидация URL",
+        "method": "GET",
+        "endpoint": "/api/v1/swagger-analysis/validate-url",
+        "params": {
+            "url": "http://localhost:8002/docs",
+            "timeout": 10
+        }
+    },
+    "cURL_examples": [
+        {
+            "description": "Анализ уязвимого API",
+            "command": """curl -X POST "http://localhost:8001/api/v1/swagger-analysis/analyze" \\
+  -H "Content-Type: application/json" \\
+  -d '{
+    "swagger_url": "http://localhost:8002/docs",
+    "enable_ai_analysis": true
+  }'"""
+        },
+        {
+            "description": "Валидация URL",
+            "command": """curl "http://localhost:8001/api/v1/swagger-analysis/validate-url?url=http://localhost:8002/docs" """
+        }
+    ]
+})
+
 @router.get("/examples", response_model=Dict[str, Any], summary="Примеры запросов")
 async def get_request_examples():
     """
@@ -257,51 +416,4 @@ async def get_request_examples():
     
     Содержит готовые JSON примеры для различных сценариев анализа.
     """
-    return {
-        "single_analysis": {
-            "description": "Анализ одной спецификации",
-            "method": "POST",
-            "endpoint": "/api/v1/swagger-analysis/analyze",
-            "body": {
-                "swagger_url": "http://localhost:8002/docs",
-                "timeout": 30,
-                "enable_ai_analysis": true
-            }
-        },
-        "batch_analysis": {
-            "description": "Пакетный анализ нескольких API",
-            "method": "POST", 
-            "endpoint": "/api/v1/swagger-analysis/batch-analyze",
-            "body": {
-                "swagger_urls": [
-                    "http://localhost:8002/docs",
-                    "https://petstore3.swagger.io/api/v3/openapi.json"
-                ],
-                "enable_ai_analysis": true
-            }
-        },
-        "url_validation": {
-            "description": "Валидация URL",
-            "method": "GET",
-            "endpoint": "/api/v1/swagger-analysis/validate-url",
-            "params": {
-                "url": "http://localhost:8002/docs",
-                "timeout": 10
-            }
-        },
-        "cURL_examples": [
-            {
-                "description": "Анализ уязвимого API",
-                "command": """curl -X POST "http://localhost:8001/api/v1/swagger-analysis/analyze" \\
-  -H "Content-Type: application/json" \\
-  -d '{
-    "swagger_url": "http://localhost:8002/docs",
-    "enable_ai_analysis": true
-  }'"""
-            },
-            {
-                "description": "Валидация URL",
-                "command": """curl "http://localhost:8001/api/v1/swagger-analysis/validate-url?url=http://localhost:8002/docs" """
-            }
-        ]
-    }
\ No newline at end of file
+    return Response(content=_REQUEST_EXAMPLES_JSON, media_type="application/json", headers=_STATIC_CACHE_HEADERS)
@@ -0,0 +1,24 @@
+"""
+Clock helpers for API Analysis Service
+"""
+
+import time
+from datetime import datetime
+
+# How long a cached timestamp may be reused, in seconds
+_UTCNOW_RESOLUTION = 0.1
+
+_utcnow_cache = (0.0, datetime.min)
+
+
+def cached_utcnow() -> datetime:
+    """
+    Current UTC time (naive, like datetime.utcnow), refreshed at most every 100 ms
+    """
+    global _utcnow_cache
+    now = time.monotonic()
+    expires, value = _utcnow_cache
+    if now >= expires:
+        value = datetime.utcnow()
+        _utcnow_cache = (now + _UTCNOW_RESOLUTION, value)
+    return value
@@ -4,8 +4,11 @@ Core configuration for API Analysis Service
 
 import os
 import logging
-from typing import Optional, List, Dict
+from functools import lru_cache
+from typing import Optional, Dict, Tuple
 from pathlib import Path
+
+import orjson
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -13,6 +16,9 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
+# .env presence does not change at runtime; reload_settings refreshes it
+_ENV_FILE_EXISTS = os.path.exists('.env')
+
 
 class Settings:
     """Application settings with environment variable support"""
@@ -40,7 +46,17 @@ class Settings:
         # Analysis configuration
         self.ANALYSIS_TIMEOUT = int(os.getenv("ANALYSIS_TIMEOUT", "30"))
         self.MAX_ENDPOINT_LENGTH = int(os.getenv("MAX_ENDPOINT_LENGTH", "2048"))
+        self.MAX_SPEC_BYTES = int(os.getenv("MAX_SPEC_BYTES", str(10 * 1024 * 1024)))
         self.MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", "10"))
+        self.THREAD_POOL_LIMIT = int(os.getenv("THREAD_POOL_LIMIT", "100"))
+        self.BULK_STATUS_MAX_ENTRIES = int(os.getenv("BULK_STATUS_MAX_ENTRIES", "10000"))
+        self.BULK_STATUS_TTL = int(os.getenv("BULK_STATUS_TTL", "3600"))
+        # Verify TLS certificates when probing endpoint performance; disable for self-signed targets
+        self.PERFORMANCE_PROBE_VERIFY_SSL = self._parse_bool(os.getenv("PERFORMANCE_PROBE_VERIFY_SSL", "true"))
+        
+        # Analysis result cache (Redis); short tier ~10s, normal tier ~60s
+        self.REDIS_URL = os.getenv("REDIS_URL", "")
+        self.ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "60"))
         
         # External services
         self.HEALTH_CHECK_SERVICE_URL = os.getenv("HEALTH_CHECK_SERVICE_URL", "http://localhost:8000")
@@ -49,6 +65,11 @@ class Settings:
         self.OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
         self.OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
         self.OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "qwen/qwen3-coder:free")
+        self.OPENROUTER_MAX_CONCURRENCY = int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "8"))
+        # Completion tokens (max_tokens) the spec analyzer may reserve per minute
+        self.OPENROUTER_TOKEN_BUDGET_PER_MINUTE = int(os.getenv("OPENROUTER_TOKEN_BUDGET_PER_MINUTE", "80000"))
+        # Overall deadline (seconds) for one streamed completion; the client timeout only bounds each read
+        self.OPENROUTER_STREAM_TIMEOUT = float(os.getenv("OPENROUTER_STREAM_TIMEOUT", "60"))
         
         # AI Analysis Settings
         self.AI_ENABLED = self._parse_bool(os.getenv("AI_ENABLED", "true"))
@@ -66,6 +87,14 @@ class Settings:
         self.AI_MAX_CACHE_SIZE = int(os.getenv("AI_MAX_CACHE_SIZE", "1000"))
         self.AI_CACHE_WARMUP = self._parse_bool(os.getenv("AI_CACHE_WARMUP", "false"))
         
+        # AI micro-batching: endpoints queued within the window share one OpenRouter request
+        self.AI_BATCH_ENABLED = self._parse_bool(os.getenv("AI_BATCH_ENABLED", "false"))
+        self.AI_BATCH_WINDOW_MS = int(os.getenv("AI_BATCH_WINDOW_MS", "25"))
+        self.AI_BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "5"))
+        
+        # Keep the raw model output in AI results (debugging only; roughly doubles cached entry size)
+        self.DEBUG_AI_RAW_RESPONSE = self._parse_bool(os.getenv("DEBUG_AI_RAW_RESPONSE", "false"))
+        
         # Validate configuration
         self._validate_configuration()
     
@@ -77,23 +106,26 @@ class Settings:
             return value.lower() in ("true", "1", "yes", "on")
         return bool(value)
     
-    def _parse_cors_origins(self) -> List[str]:
+    def _parse_cors_origins(self) -> Tuple[str, ...]:
         """Parse CORS origins from environment variable"""
-        cors_origins = os.getenv("BACKEND_CORS_ORIGINS", '["*"]')
-        
+        return self._parse_cors_value(os.getenv("BACKEND_CORS_ORIGINS", '["*"]'))
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _parse_cors_value(cors_origins: str) -> Tuple[str, ...]:
+        """Parse a raw BACKEND_CORS_ORIGINS value; cached so repeated Settings() builds reuse it"""
         if cors_origins == "*":
-            return ["*"]
+            return ("*",)
         
         try:
-            import json
-            return json.loads(cors_origins)
-        except (json.JSONDecodeError, TypeError):
+            return tuple(orjson.loads(cors_origins))
+        except (orjson.JSONDecodeError, TypeError):
             # Fallback: split by comma if JSON parsing fails
-            return [
+            return tuple(
                 item.strip().strip('"').strip("'") 
                 for item in cors_origins.split(",") 
                 if item.strip()
-            ]
+            )
     
     def _validate_configuration(self):
         """Validate configuration and log warnings/errors"""
@@ -112,14 +144,24 @@ class Settings:
             logger.warning("Running in DEBUG mode - not recommended for production")
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Shared Settings instance; usable as a FastAPI dependency"""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
 
 def reload_settings() -> Settings:
     """Reload settings from environment (useful for testing)"""
-    global settings
-    settings = Settings()
+    global settings, _ENV_FILE_EXISTS
+    _ENV_FILE_EXISTS = os.path.exists('.env')
+    get_settings.cache_clear()
+    validate_configuration.cache_clear()
+    get_config_summary.cache_clear()
+    settings = get_settings()
     logger.info("Settings reloaded successfully")
     return settings
 
@@ -139,21 +181,22 @@ def is_ai_enabled() -> bool:
     return settings.AI_ENABLED and bool(get_api_key())
 
 
+@lru_cache(maxsize=1)
 def validate_configuration() -> Dict[str, bool]:
-    """Validate current configuration and return status"""
-    env_file_exists = os.path.exists('.env')
+    """Validate current configuration and return status (memoized until reload_settings)"""
     return {
         'api_key_configured': bool(get_api_key()),
         'ai_enabled': is_ai_enabled(),
-        'env_file_exists': env_file_exists,
+        'env_file_exists': _ENV_FILE_EXISTS,
         'debug_mode': settings.DEBUG,
         'cors_configured': len(settings.BACKEND_CORS_ORIGINS) > 0,
-        'all_env_vars_loaded': env_file_exists
+        'all_env_vars_loaded': _ENV_FILE_EXISTS
     }
 
 
+@lru_cache(maxsize=1)
 def get_config_summary() -> Dict[str, any]:
-    """Get configuration summary for logging (excluding sensitive data)"""
+    """Get configuration summary for logging (excluding sensitive data; memoized until reload_settings)"""
     return {
         'service_name': settings.SERVICE_NAME,
         'service_version': settings.SERVICE_VERSION,
@@ -162,5 +205,5 @@ def get_config_summary() -> Dict[str, any]:
         'ai_model': settings.OPENROUTER_MODEL if settings.OPENROUTER_API_KEY else 'not_configured',
         'cors_origins_count': len(settings.BACKEND_CORS_ORIGINS),
         'port': settings.PORT,
-        'config_loaded_from': '.env file' if os.path.exists('.env') else 'environment variables'
+        'config_loaded_from': '.env file' if _ENV_FILE_EXISTS else 'environment variables'
     }
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+Thread pools owned by the application lifespan
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Request
+
+from src.core.config import settings
+
+
+def create_parse_executor() -> ThreadPoolExecutor:
+    """
+    Build the pool that parses large specs off the event loop; it is kept apart from
+    the default executor, which outbound requests need for DNS resolution
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.MAX_CONCURRENT_ANALYSES, thread_name_prefix="spec-parse"
+    )
+
+
+async def get_parse_executor(request: Request) -> ThreadPoolExecutor:
+    """
+    FastAPI dependency returning the parse pool created in the app lifespan
+    """
+    return request.app.state.parse_executor
@@ -0,0 +1,75 @@
+"""
+Shared outbound HTTP client for API Analysis Service
+"""
+
+from typing import Dict
+
+import aiohttp
+import httpx
+from fastapi import Request
+
+from src.core.config import settings
+
+try:
+    import h2  # noqa: F401 - only checked for availability
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - h2 is optional
+    _HTTP2_AVAILABLE = False
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build the long-lived AsyncClient; connections are kept alive between requests.
+    With h2 installed, same-host requests are multiplexed over one HTTP/2 connection
+    (negotiated via ALPN, HTTP/1.1 otherwise)
+    """
+    return httpx.AsyncClient(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=50,
+            keepalive_expiry=30.0,
+        ),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    )
+
+
+def create_openrouter_client(base_url: str, headers: Dict[str, str]) -> httpx.AsyncClient:
+    """
+    Build a long-lived client for the OpenRouter API; LLM calls are slow, so the
+    pool keeps enough connections alive for concurrent bulk analysis
+    """
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        http2=_HTTP2_AVAILABLE,
+        timeout=60.0,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    )
+
+
+def create_batch_session() -> aiohttp.ClientSession:
+    """
+    Build the aiohttp session used for high fan-out batch spec downloads
+    """
+    connector = aiohttp.TCPConnector(
+        limit=settings.MAX_CONCURRENT_ANALYSES * 2,
+        limit_per_host=32,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def get_http_client(request: Request) -> httpx.AsyncClient:
+    """
+    FastAPI dependency returning the client created in the app lifespan
+    """
+    return request.app.state.http_client
+
+
+async def get_batch_session(request: Request) -> aiohttp.ClientSession:
+    """
+    FastAPI dependency returning the batch session created in the app lifespan
+    """
+    return request.app.state.batch_session
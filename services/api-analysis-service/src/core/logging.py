@@ -3,14 +3,26 @@ Logging configuration for API Analysis Service
 """
 
 import logging
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+# Background thread that formats and writes records queued by the request path
+_queue_listener: Optional[QueueListener] = None
+# stdout/stderr handlers; attached to the root logger directly unless the listener owns them
+_stream_handlers: List[logging.Handler] = []
 
 
 def setup_logging(level: Optional[str] = None, format_string: Optional[str] = None):
     """
-    Setup logging configuration
+    Setup logging configuration.
+    Records are written to the streams directly until start_logging moves them to the listener
     """
+    global _stream_handlers
+    
     # Default log level
     log_level = level or "INFO"
     
@@ -19,14 +31,24 @@ def setup_logging(level: Optional[str] = None, format_string: Optional[str] = No
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     
+    # Each record goes to exactly one stream: INFO and below to stdout, WARNING+ to stderr
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setLevel(logging.WARNING)
+    
+    formatter = logging.Formatter(log_format)
+    stdout_handler.setFormatter(formatter)
+    stderr_handler.setFormatter(formatter)
+    
+    stop_logging()
+    _stream_handlers = [stdout_handler, stderr_handler]
+    
     # Setup logging
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format=log_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.StreamHandler(sys.stderr),
-        ]
+        handlers=_stream_handlers,
+        force=True
     )
     
     # Set specific logger levels
@@ -40,6 +62,74 @@ def setup_logging(level: Optional[str] = None, format_string: Optional[str] = No
     logger.info(f"Logging configured with level: {log_level}")
 
 
+def start_logging():
+    """
+    Move stream output to a background listener (called at app startup)
+    """
+    global _queue_listener
+    
+    if _queue_listener is not None:
+        return
+    
+    # Log calls only enqueue the record; formatting and stream writes happen off the event loop.
+    # The queue handler itself only merges args into the message, the listener applies log_format
+    log_queue = queue.SimpleQueue()
+    _queue_listener = QueueListener(log_queue, *_stream_handlers, respect_handler_level=True)
+    _queue_listener.start()
+    
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    for handler in _stream_handlers:
+        root.removeHandler(handler)
+
+
+def stop_logging():
+    """
+    Flush queued records, stop the background listener and write to the streams directly again
+    """
+    global _queue_listener
+    
+    if _queue_listener is None:
+        return
+    
+    # Reattach the stream handlers before detaching the queue so no record is dropped in between
+    root = logging.getLogger()
+    for handler in _stream_handlers:
+        root.addHandler(handler)
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler) and handler.queue is _queue_listener.queue:
+            root.removeHandler(handler)
+    
+    _queue_listener.stop()
+    _queue_listener = None
+
+
+class LogRateLimiter:
+    """
+    Token bucket for sampling high-volume log records
+    """
+    
+    def __init__(self, rate: float = 10.0, burst: int = 20):
+        self.rate = rate
+        self.burst = burst
+        self.suppressed = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def consume(self) -> bool:
+        """Take a token; False means the record should be dropped"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with the specified name
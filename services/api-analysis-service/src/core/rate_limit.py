@@ -0,0 +1,87 @@
+"""
+Async rate limiting primitives for outbound API calls
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Coroutine, Deque, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Token bucket allowing bursts of up to `capacity` calls, refilled at `rate` tokens per second
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """Wait until `cost` tokens are available and take them"""
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                wait = (cost - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+class CreditSemaphore:
+    """
+    Semaphore over a budget of credits (e.g. LLM tokens per minute). A transaction takes
+    its credits up front and returns them `refund_time` seconds later. Waiters are checked
+    in arrival order, but any waiter that fits the remaining budget proceeds, so small
+    requests are not held up behind a large one
+    """
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.available = float(capacity)
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+    async def acquire(self, credits: float) -> None:
+        """Wait until `credits` are available and take them"""
+        if self.available >= credits:
+            self.available -= credits
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((credits, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Granted just before the cancellation landed: hand the credits back
+            if waiter.done() and not waiter.cancelled():
+                self.release(credits)
+            raise
+
+    def release(self, credits: float) -> None:
+        """Return credits to the budget and wake the waiters that now fit"""
+        self.available = min(self.capacity, self.available + credits)
+        for needed, waiter in self._waiters:
+            if not waiter.done() and needed <= self.available:
+                self.available -= needed
+                waiter.set_result(None)
+        self._waiters = deque(entry for entry in self._waiters if not entry[1].done())
+
+    async def transact(self, coro: Coroutine[Any, Any, T], credits: float, refund_time: float) -> T:
+        """Run `coro` once `credits` are reserved; they are refunded `refund_time` seconds after it starts"""
+        # A single request larger than the whole budget still runs, alone
+        credits = min(credits, self.capacity)
+        try:
+            await self.acquire(credits)
+        except BaseException:
+            coro.close()
+            raise
+        asyncio.get_running_loop().call_later(refund_time, self.release, credits)
+        return await coro
@@ -3,122 +3,37 @@ AI Security Analyzer using OpenRouter API
 """
 
 import asyncio
-import json
 import logging
 import time
-from typing import Dict, List, Any, Optional, Union
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Any, Optional, Set, Tuple, Union
 from datetime import datetime
 import hashlib
 
 import aiohttp
+import orjson
+from pydantic_core import from_json
 
 from src.api.models import SecurityCheck
 from src.core.config import settings
+from src.core.rate_limit import TokenBucket
 
-logger = logging.getLogger(__name__)
-
+try:
+    import redis.asyncio as redis_async
+except ImportError:  # pragma: no cover - redis is optional
+    redis_async = None
 
-class AISecurityAnalyzer:
-    """AI-powered security analyzer using OpenRouter API"""
-    
-    def __init__(self):
-        self.api_key = settings.OPENROUTER_API_KEY
-        self.api_base_url = "https://openrouter.ai/api/v1/chat/completions"
-        self.model = "qwen/qwen3-coder:free"
-        self.temperature = 0.1
-        self.max_tokens = 2048
-        
-        # Cache for AI responses
-        self._response_cache = {}
-        self._cache_ttl = 3600  # 1 hour
-        
-        # Rate limiting
-        self._last_request_time = 0
-        self._min_interval = 1.0  # Minimum 1 second between requests
-        
-    async def analyze_endpoint(
-        self, 
-        endpoint: str, 
-        endpoint_info: Optional[Dict[str, Any]] = None,
-        context: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """
-        Analyze endpoint using AI with OpenRouter API
-        """
-        logger.info(f"Starting AI analysis for endpoint: {endpoint}")
-        
-        try:
-            # Check cache first
-            cache_key = self._get_cache_key(endpoint, endpoint_info, context)
-            cached_result = await self._get_cached_response(cache_key)
-            if cached_result:
-                logger.info(f"Returning cached AI analysis for {endpoint}")
-                return cached_result
-            
-            # Prepare analysis context
-            analysis_context = self._prepare_analysis_context(endpoint, endpoint_info, context)
-            
-            # Generate prompt
-            prompt = self._generate_security_prompt(analysis_context)
-            
-            # Get AI response
-            ai_response = await self._call_openrouter_api(prompt)
-            
-            # Parse and structure response
-            structured_result = await self._parse_ai_response(ai_response, endpoint)
-            
-            # Cache the result
-            await self._cache_response(cache_key, structured_result)
-            
-            logger.info(f"AI analysis completed for {endpoint}")
-            return structured_result
-            
-        except Exception as e:
-            logger.error(f"Error in AI analysis for {endpoint}: {str(e)}")
-            return self._get_fallback_response(endpoint, str(e))
-    
-    def _prepare_analysis_context(
-        self, 
-        endpoint: str, 
-        endpoint_info: Optional[Dict[str, Any]], 
-        context: Optional[str]
-    ) -> Dict[str, Any]:
-        """Prepare context for AI analysis"""
-        
-        context_data = {
-            "endpoint": endpoint,
-            "timestamp": datetime.utcnow().isoformat(),
-            "analysis_type": "security_comprehensive"
-        }
-        
-        if endpoint_info:
-            context_data.update(endpoint_info)
-        
-        if context:
-            context_data["additional_context"] = context
-            
-        return context_data
-    
-    def _generate_security_prompt(self, context: Dict[str, Any]) -> str:
-        """Generate comprehensive security analysis prompt"""
-        
-        endpoint = context.get("endpoint", "")
-        method = context.get("method", "GET")
-        headers = context.get("headers", {})
-        response_status = context.get("response_status", "N/A")
-        
-        prompt = f"""
-You are an expert API security analyst. Analyze the following API endpoint for security vulnerabilities and best practices.
-
-Endpoint Information:
-- URL: {endpoint}
-- HTTP Method: {method}
-- Response Status: {response_status}
-- Headers: {json.dumps(headers, indent=2) if headers else "Not available"}
+logger = logging.getLogger(__name__)
 
-Please provide a comprehensive security analysis in the following JSON format:
+# Partial JSON parsing (tolerates responses cut off by max_tokens) needs a recent pydantic-core
+try:
+    from_json(b"{", allow_partial="trailing-strings")
+    _PARTIAL_JSON_SUPPORTED = True
+except (TypeError, ValueError):
+    _PARTIAL_JSON_SUPPORTED = False
 
-{{
+# JSON shape requested from the model for each analyzed endpoint
+_RESPONSE_FORMAT = """{{
   "security_assessment": {{
     "overall_risk_level": "low|medium|high|critical",
     "confidence_score": 0.0-1.0,
@@ -187,31 +102,409 @@ Please provide a comprehensive security analysis in the following JSON format:
     "priority_actions": ["action1", "action2"],
     "overall_assessment": "summary_text"
   }}
-}}
+}}"""
+
+# Security analysis prompt; only the four endpoint fields vary per call
+_PROMPT_TEMPLATE = """
+You are an expert API security analyst. Analyze the following API endpoint for security vulnerabilities and best practices.
+
+Endpoint Information:
+- URL: {endpoint}
+- HTTP Method: {method}
+- Response Status: {response_status}
+- Headers: {headers_json}
+
+Please provide a comprehensive security analysis in the following JSON format:
+
+""" + _RESPONSE_FORMAT + """
 
 Please analyze carefully and provide detailed, actionable insights. Focus on practical security issues that could be exploited.
 """
-        
-        return prompt
+
+# Micro-batched variant: several endpoints, answered with one JSON array in the same order
+_BATCH_PROMPT_TEMPLATE = """
+You are an expert API security analyst. Analyze each of the following {count} API endpoints for security vulnerabilities and best practices.
+
+{endpoints}
+Respond with a JSON array of exactly {count} analyses, one per endpoint and in the order listed. Each element must use the following JSON format:
+
+""" + _RESPONSE_FORMAT + """
+
+Please analyze carefully and provide detailed, actionable insights. Focus on practical security issues that could be exploited.
+"""
+
+_BATCH_ENDPOINT_TEMPLATE = """Endpoint {index}:
+- URL: {endpoint}
+- HTTP Method: {method}
+- Response Status: {response_status}
+- Headers: {headers_json}
+"""
+
+# How much streamed text to accumulate between partial re-parses in analyze_endpoint_stream
+_STREAM_PARSE_INTERVAL = 512
+
+# Responses longer than this (chars) are parsed in a worker thread
+_THREAD_PARSE_THRESHOLD = 4096
+
+# Cache lifetime (seconds) per assessed risk level: severe findings for an unchanged endpoint
+# stay valid for long, while unknown results (fallbacks) are never cached
+_RISK_CACHE_TTLS = {
+    "critical": 24 * 3600,
+    "high": 6 * 3600,
+    "medium": 3600,
+    "low": 3600,
+    "unknown": 0,
+}
+
+# compliance_assessment keys and the labels they are reported under
+_COMPLIANCE_RISK_LABELS = (
+    ("gdpr_compliance_risks", "GDPR"),
+    ("hipaa_compliance_risks", "HIPAA"),
+    ("pci_dss_compliance_risks", "PCI_DSS"),
+)
+
+
+def _fallback_status_check(error: str) -> SecurityCheck:
+    """
+    Status check attached to fallback results. Built per call: details is a plain dict,
+    so a shared instance could be mutated by one caller under every other fallback
+    """
+    return SecurityCheck(
+        name="ai_analysis_status",
+        passed=False,
+        description="AI analysis unavailable",
+        severity="medium",
+        details={"error": error}
+    )
+
+
+class AISecurityAnalyzer:
+    """AI-powered security analyzer using OpenRouter API"""
     
-    async def _call_openrouter_api(self, prompt: str) -> str:
-        """Call OpenRouter API with rate limiting"""
-        
-        # Rate limiting
-        current_time = time.time()
-        time_since_last = current_time - self._last_request_time
-        if time_since_last < self._min_interval:
-            sleep_time = self._min_interval - time_since_last
-            await asyncio.sleep(sleep_time)
+    _L2_PREFIX = "ai_sec:"
+    
+    def __init__(self):
+        self.api_key = settings.OPENROUTER_API_KEY
+        self.api_base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.model = "qwen/qwen3-coder:free"
+        self.temperature = 0.1
+        self.max_tokens = 2048
         
-        headers = {
+        # Request headers never change for the life of the analyzer
+        self._base_headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://security-orchestrator.local",
             "X-Title": "Security Orchestrator AI Analysis"
         }
         
-        payload = {
+        # LRU cache for AI responses: cache_key -> (expires_at, result), oldest first
+        self._response_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_ttl = 3600  # 1 hour, for risk levels without their own TTL
+        self._max_cache_entries = 100
+        
+        # Shared L2 cache behind the per-process LRU, so replicas reuse each other's analyses
+        self._redis = None
+        if settings.REDIS_URL and redis_async is not None:
+            self._redis = redis_async.from_url(settings.REDIS_URL)
+        elif settings.REDIS_URL:
+            logger.warning("REDIS_URL is set but the redis package is not installed - AI L2 cache disabled")
+        
+        # Analyses currently running, so concurrent callers for the same key share one API call
+        self._inflight_futures: Dict[str, asyncio.Future] = {}
+        
+        # Rate limiting: bursts of AI_BURST_LIMIT, then AI_RATE_LIMIT_PER_MINUTE sustained
+        self._bucket = TokenBucket(
+            rate=settings.AI_RATE_LIMIT_PER_MINUTE / 60.0,
+            capacity=settings.AI_BURST_LIMIT
+        )
+        # Caps requests in flight at once; independent of the request rate above
+        self._inflight = asyncio.Semaphore(settings.OPENROUTER_MAX_CONCURRENCY or 8)
+        
+        # Micro-batching: contexts queued within one window are analyzed by a single request
+        self._batch_enabled = settings.AI_BATCH_ENABLED
+        self._batch_window_ms = settings.AI_BATCH_WINDOW_MS
+        self._batch_max_size = max(1, settings.AI_BATCH_MAX_SIZE)
+        self._batch_queue: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._batch_task: Optional[asyncio.Task] = None
+        self._batch_dispatches: Set[asyncio.Task] = set()
+        
+        # Shared HTTP session; keeps connections to OpenRouter alive between calls.
+        # connect fails a stalled TCP/TLS handshake fast; sock_read bounds gaps between stream chunks
+        self._timeout = aiohttp.ClientTimeout(total=60, connect=10, sock_read=60)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        
+    async def analyze_endpoint(
+        self, 
+        endpoint: str, 
+        endpoint_info: Optional[Dict[str, Any]] = None,
+        context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze endpoint using AI with OpenRouter API
+        """
+        logger.info(f"Starting AI analysis for endpoint: {endpoint}")
+        # One timestamp for the context, the result and any fallback of this analysis
+        timestamp = datetime.utcnow().isoformat()
+        
+        try:
+            # Check cache first
+            cache_key = self._get_cache_key(endpoint, endpoint_info, context)
+            cached_result = await self._get_cached_response(cache_key)
+            if cached_result:
+                logger.info(f"Returning cached AI analysis for {endpoint}")
+                return cached_result
+            
+            # Join an identical analysis already in flight. The lookup and insert below have
+            # no await between them, so no lock is needed to make them atomic on the loop
+            pending = self._inflight_futures.get(cache_key)
+            if pending is not None:
+                logger.info(f"Awaiting in-flight AI analysis for {endpoint}")
+                return await asyncio.shield(pending)
+            
+            pending = asyncio.get_running_loop().create_future()
+            self._inflight_futures[cache_key] = pending
+            try:
+                structured_result = await self._run_analysis(endpoint, endpoint_info, context, timestamp)
+                
+                # Cache the result
+                await self._cache_response(cache_key, structured_result)
+                pending.set_result(structured_result)
+            except Exception as e:
+                pending.set_result(self._get_fallback_response(endpoint, str(e), timestamp))
+                raise
+            finally:
+                del self._inflight_futures[cache_key]
+                if not pending.done():
+                    pending.cancel()
+            
+            logger.info(f"AI analysis completed for {endpoint}")
+            return structured_result
+            
+        except Exception as e:
+            logger.error(f"Error in AI analysis for {endpoint}: {str(e)}")
+            return self._get_fallback_response(endpoint, str(e), timestamp)
+    
+    async def _run_analysis(
+        self,
+        endpoint: str,
+        endpoint_info: Optional[Dict[str, Any]],
+        context: Optional[str],
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the prompt, call OpenRouter and structure the response"""
+        # Prepare analysis context
+        analysis_context = self._prepare_analysis_context(endpoint, endpoint_info, context, timestamp)
+        
+        if self._batch_enabled:
+            parsed, ai_response = await self._enqueue_batch(analysis_context)
+            return self._structure_result(parsed, ai_response, endpoint, timestamp)
+        
+        # Generate prompt
+        prompt = self._generate_security_prompt(analysis_context)
+        
+        # Get AI response
+        ai_response = await self._call_openrouter_api(prompt)
+        
+        # Parse and structure response
+        return await self._parse_ai_response(ai_response, endpoint, timestamp)
+    
+    async def analyze_endpoint_stream(
+        self,
+        endpoint: str,
+        endpoint_info: Optional[Dict[str, Any]] = None,
+        context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of analyze_endpoint.
+        Yields {"type": "vulnerability", ...} events as the model emits them,
+        then a final {"type": "result", "result": ...} with the full analysis.
+        """
+        timestamp = datetime.utcnow().isoformat()
+        try:
+            cache_key = self._get_cache_key(endpoint, endpoint_info, context)
+            cached_result = await self._get_cached_response(cache_key)
+            if cached_result:
+                yield {"type": "result", "result": cached_result}
+                return
+            
+            analysis_context = self._prepare_analysis_context(endpoint, endpoint_info, context, timestamp)
+            prompt = self._generate_security_prompt(analysis_context)
+            
+            parts: List[str] = []
+            received = 0
+            next_parse = _STREAM_PARSE_INTERVAL
+            emitted = 0
+            async for delta in self._stream_openrouter_api(prompt):
+                parts.append(delta)
+                received += len(delta)
+                if not _PARTIAL_JSON_SUPPORTED or received < next_parse:
+                    continue
+                next_parse = received + _STREAM_PARSE_INTERVAL
+                
+                # All but the last listed vulnerability are complete once a later one has started
+                vulnerabilities = self._partial_vulnerabilities("".join(parts))
+                for vuln in self._convert_vulnerabilities(vulnerabilities[emitted:-1]):
+                    yield {"type": "vulnerability", "vulnerability": vuln}
+                emitted = max(emitted, len(vulnerabilities) - 1)
+            
+            structured_result = await self._parse_ai_response("".join(parts), endpoint, timestamp)
+            for vuln in structured_result.get("vulnerabilities", [])[emitted:]:
+                yield {"type": "vulnerability", "vulnerability": vuln}
+            
+            await self._cache_response(cache_key, structured_result)
+            yield {"type": "result", "result": structured_result}
+            
+        except Exception as e:
+            logger.error("Error in streaming AI analysis for %s: %s", endpoint, e)
+            yield {"type": "result", "result": self._get_fallback_response(endpoint, str(e), timestamp)}
+    
+    def _partial_vulnerabilities(self, text: str) -> List[Dict[str, Any]]:
+        """Vulnerabilities parsed so far from an incomplete response"""
+        json_start = text.find("{")
+        if json_start == -1:
+            return []
+        try:
+            parsed = from_json(text[json_start:], allow_partial="trailing-strings")
+        except ValueError:
+            return []
+        vulnerabilities = parsed.get("vulnerabilities") if isinstance(parsed, dict) else None
+        return vulnerabilities if isinstance(vulnerabilities, list) else []
+    
+    def _prepare_analysis_context(
+        self, 
+        endpoint: str, 
+        endpoint_info: Optional[Dict[str, Any]], 
+        context: Optional[str],
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Prepare context for AI analysis"""
+        
+        context_data = {
+            "endpoint": endpoint,
+            "timestamp": timestamp or datetime.utcnow().isoformat(),
+            "analysis_type": "security_comprehensive"
+        }
+        
+        if endpoint_info:
+            context_data.update(endpoint_info)
+        
+        if context:
+            context_data["additional_context"] = context
+            
+        return context_data
+    
+    def _prompt_fields(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Endpoint fields substituted into the prompt templates"""
+        
+        headers = context.get("headers", {})
+        headers_json = (
+            orjson.dumps(headers, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+            if headers else "Not available"
+        )
+        return {
+            "endpoint": context.get("endpoint", ""),
+            "method": context.get("method", "GET"),
+            "response_status": context.get("response_status", "N/A"),
+            "headers_json": headers_json
+        }
+    
+    def _generate_security_prompt(self, context: Dict[str, Any]) -> str:
+        """Generate comprehensive security analysis prompt"""
+        return _PROMPT_TEMPLATE.format(**self._prompt_fields(context))
+    
+    def _generate_batch_prompt(self, contexts: List[Dict[str, Any]]) -> str:
+        """Generate one prompt covering several endpoints"""
+        endpoints = "\n".join([
+            _BATCH_ENDPOINT_TEMPLATE.format(index=index, **self._prompt_fields(context))
+            for index, context in enumerate(contexts, 1)
+        ])
+        return _BATCH_PROMPT_TEMPLATE.format(count=len(contexts), endpoints=endpoints)
+    
+    async def _enqueue_batch(self, context: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Queue a context for the next batch and wait for its parsed analysis"""
+        future = asyncio.get_running_loop().create_future()
+        self._batch_queue.append((context, future))
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_task = asyncio.create_task(self._drain_batches())
+        return await future
+    
+    async def _drain_batches(self) -> None:
+        """Every batch window, dispatch the queued contexts in groups of at most _batch_max_size"""
+        while self._batch_queue:
+            await asyncio.sleep(self._batch_window_ms / 1000)
+            queue, self._batch_queue = self._batch_queue, []
+            for start in range(0, len(queue), self._batch_max_size):
+                task = asyncio.create_task(self._dispatch_batch(queue[start:start + self._batch_max_size]))
+                self._batch_dispatches.add(task)
+                task.add_done_callback(self._batch_dispatches.discard)
+    
+    async def _dispatch_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Analyze a group of queued contexts with one OpenRouter request"""
+        # Callers that were cancelled while queued no longer need an analysis
+        batch = [(context, future) for context, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        try:
+            if len(batch) == 1:
+                ai_response = await self._call_openrouter_api(self._generate_security_prompt(batch[0][0]))
+                analyses = [await self._load_json(ai_response, "{", "}")]
+            else:
+                ai_response = await self._call_openrouter_api(
+                    self._generate_batch_prompt([context for context, _ in batch]),
+                    max_tokens=self.max_tokens * len(batch)
+                )
+                analyses = await self._load_json(ai_response, "[", "]")
+            
+            for index, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if index < len(analyses) and isinstance(analyses[index], dict):
+                    future.set_result((analyses[index], ai_response))
+                else:
+                    future.set_exception(Exception("Batch AI response is missing this endpoint's analysis"))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session lazily on the running loop"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=100,
+                            limit_per_host=32,
+                            ttl_dns_cache=300,
+                            keepalive_timeout=75
+                        ),
+                        timeout=self._timeout
+                    )
+        return self._session
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._redis is not None:
+            await self._redis.aclose()
+    
+    async def _call_openrouter_api(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Call OpenRouter API with rate limiting"""
+        return "".join([delta async for delta in self._stream_openrouter_api(prompt, max_tokens)])
+    
+    async def _stream_openrouter_api(self, prompt: str, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Call OpenRouter API with stream=True and yield content deltas from the SSE frames"""
+        
+        # Rate limiting
+        await self._bucket.acquire()
+        
+        body = orjson.dumps({
             "model": self.model,
             "messages": [
                 {
@@ -220,96 +513,163 @@ Please analyze carefully and provide detailed, actionable insights. Focus on pra
                 }
             ],
             "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "stream": False
-        }
+            "max_tokens": max_tokens or self.max_tokens,
+            "stream": True
+        })
         
         try:
-            async with aiohttp.ClientSession() as session:
+            session = await self._get_session()
+            async with self._inflight:
                 async with session.post(
                     self.api_base_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
+                    headers=self._base_headers,
+                    data=body
                 ) as response:
                     
-                    if response.status == 200:
-                        result = await response.json()
-                        self._last_request_time = time.time()
-                        return result["choices"][0]["message"]["content"]
-                    else:
+                    if response.status != 200:
                         error_text = await response.text()
                         raise Exception(f"OpenRouter API error: {response.status} - {error_text}")
+                    
+                    async for line in response.content:
+                        # SSE: "data: {...}" frames, ": comment" keep-alives, "data: [DONE]" terminator
+                        if not line.startswith(b"data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == b"[DONE]":
+                            break
+                        if not data:
+                            continue
+                        
+                        chunk = orjson.loads(data)
+                        if "error" in chunk:
+                            raise Exception(f"OpenRouter API error: {chunk['error']}")
+                        choices = chunk.get("choices")
+                        if choices:
+                            content = (choices[0].get("delta") or {}).get("content")
+                            if content:
+                                yield content
                         
         except asyncio.TimeoutError:
             raise Exception("OpenRouter API timeout")
         except aiohttp.ClientError as e:
             raise Exception(f"OpenRouter API client error: {str(e)}")
     
-    async def _parse_ai_response(self, ai_response: str, endpoint: str) -> Dict[str, Any]:
+    async def _parse_ai_response(
+        self,
+        ai_response: str,
+        endpoint: str,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Parse and structure AI response"""
+        timestamp = timestamp or datetime.utcnow().isoformat()
         
         try:
-            # Extract JSON from response
-            json_start = ai_response.find("{")
-            json_end = ai_response.rfind("}") + 1
-            
-            if json_start == -1 or json_end == 0:
-                raise Exception("No JSON found in AI response")
+            # Large responses are parsed off the event loop so other analyses keep progressing
+            if len(ai_response) > _THREAD_PARSE_THRESHOLD:
+                return await asyncio.to_thread(self._build_result, ai_response, endpoint, timestamp)
+            return self._build_result(ai_response, endpoint, timestamp)
             
-            json_str = ai_response[json_start:json_end]
-            parsed = json.loads(json_str)
-            
-            # Convert to structured format
-            result = {
-                "ai_analysis": {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "model_used": self.model,
-                    "raw_response": ai_response,
-                    "parsed_result": parsed
-                },
-                "security_assessment": {
-                    "risk_level": parsed.get("security_assessment", {}).get("overall_risk_level", "medium"),
-                    "confidence_score": parsed.get("security_assessment", {}).get("confidence_score", 0.5),
-                    "is_secure": parsed.get("security_assessment", {}).get("is_secure", True)
-                },
-                "vulnerabilities": self._convert_vulnerabilities(parsed.get("vulnerabilities", [])),
-                "security_checks": self._convert_security_checks(parsed),
-                "recommendations": self._extract_recommendations(parsed),
-                "compliance_issues": self._extract_compliance_issues(parsed),
-                "best_practices": self._extract_best_practices(parsed),
-                "details": {
-                    "endpoint": endpoint,
-                    "analysis_method": "ai_powered",
-                    "ai_model": self.model,
-                    "structured_analysis": parsed
-                }
-            }
-            
-            return result
-            
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse AI response JSON: {str(e)}")
             logger.debug(f"AI Response: {ai_response}")
-            return self._get_fallback_response(endpoint, f"JSON parsing error: {str(e)}")
+            return self._get_fallback_response(endpoint, f"JSON parsing error: {str(e)}", timestamp)
         except Exception as e:
             logger.error(f"Error parsing AI response: {str(e)}")
-            return self._get_fallback_response(endpoint, f"Parsing error: {str(e)}")
+            return self._get_fallback_response(endpoint, f"Parsing error: {str(e)}", timestamp)
+    
+    def _build_result(self, ai_response: str, endpoint: str, timestamp: str) -> Dict[str, Any]:
+        """Extract the JSON payload from an AI response and convert it to the result format"""
+        parsed = self._extract_json(ai_response, "{", "}")
+        return self._structure_result(parsed, ai_response, endpoint, timestamp)
+    
+    async def _load_json(self, ai_response: str, opener: str, closer: str) -> Any:
+        """_extract_json, run in a worker thread for large responses"""
+        if len(ai_response) > _THREAD_PARSE_THRESHOLD:
+            return await asyncio.to_thread(self._extract_json, ai_response, opener, closer)
+        return self._extract_json(ai_response, opener, closer)
+    
+    @staticmethod
+    def _extract_json(ai_response: str, opener: str, closer: str) -> Any:
+        """Extract the JSON object ("{", "}") or array ("[", "]") embedded in an AI response"""
+        expected_type = dict if opener == "{" else list
+        
+        # Extract JSON from response
+        json_start = ai_response.find(opener)
+        if json_start == -1:
+            raise Exception("No JSON found in AI response")
+        
+        parsed = None
+        if _PARTIAL_JSON_SUPPORTED:
+            # Parses from the first bracket, ignoring trailing text and closing truncated output
+            try:
+                parsed = from_json(ai_response[json_start:], allow_partial="trailing-strings")
+            except ValueError:
+                parsed = None
+        
+        if not isinstance(parsed, expected_type):
+            json_end = ai_response.rfind(closer) + 1
+            if json_end == 0:
+                raise Exception("No JSON found in AI response")
+            parsed = orjson.loads(ai_response[json_start:json_end])
+            if not isinstance(parsed, expected_type):
+                raise Exception("Unexpected JSON type in AI response")
+        
+        return parsed
+    
+    def _structure_result(
+        self,
+        parsed: Dict[str, Any],
+        ai_response: str,
+        endpoint: str,
+        timestamp: Optional[str]
+    ) -> Dict[str, Any]:
+        """Convert a parsed AI analysis to the result format"""
+        timestamp = timestamp or datetime.utcnow().isoformat()
+        
+        # Convert to structured format
+        result = {
+            "ai_analysis": {
+                "timestamp": timestamp,
+                "model_used": self.model,
+                "parsed_result": parsed
+            },
+            "security_assessment": {
+                "risk_level": parsed.get("security_assessment", {}).get("overall_risk_level", "medium"),
+                "confidence_score": parsed.get("security_assessment", {}).get("confidence_score", 0.5),
+                "is_secure": parsed.get("security_assessment", {}).get("is_secure", True)
+            },
+            "vulnerabilities": self._convert_vulnerabilities(parsed.get("vulnerabilities", [])),
+            "security_checks": self._convert_security_checks(parsed),
+            "recommendations": self._extract_recommendations(parsed),
+            "compliance_issues": self._extract_compliance_issues(parsed),
+            "best_practices": self._extract_best_practices(parsed),
+            "details": {
+                "endpoint": endpoint,
+                "analysis_method": "ai_powered",
+                "ai_model": self.model,
+                "structured_analysis": parsed
+            }
+        }
+        
+        # The raw text duplicates parsed_result; only keep it when debugging prompts
+        if settings.DEBUG_AI_RAW_RESPONSE:
+            result["ai_analysis"]["raw_response"] = ai_response
+        
+        return result
     
     def _convert_vulnerabilities(self, vulnerabilities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Convert AI vulnerabilities to standard format"""
         
-        converted = []
-        for vuln in vulnerabilities:
-            converted.append({
+        return [
+            {
                 "type": vuln.get("type", "unknown"),
                 "severity": vuln.get("severity", "medium"),
                 "description": vuln.get("description", ""),
                 "recommendation": vuln.get("recommendation", ""),
                 "evidence": vuln.get("evidence", "")
-            })
-        
-        return converted
+            }
+            for vuln in vulnerabilities
+        ]
     
     def _convert_security_checks(self, parsed_result: Dict[str, Any]) -> List[SecurityCheck]:
         """Convert AI analysis to security checks"""
@@ -380,101 +740,140 @@ Please analyze carefully and provide detailed, actionable insights. Focus on pra
     def _extract_recommendations(self, parsed_result: Dict[str, Any]) -> List[str]:
         """Extract recommendations from AI analysis"""
         
-        recommendations = []
-        
         # From vulnerabilities
-        for vuln in parsed_result.get("vulnerabilities", []):
-            if vuln.get("recommendation"):
-                recommendations.append(f"{vuln.get('type', 'Vulnerability')}: {vuln.get('recommendation')}")
+        recommendations = [
+            f"{vuln.get('type', 'Vulnerability')}: {vuln['recommendation']}"
+            for vuln in parsed_result.get("vulnerabilities", [])
+            if vuln.get("recommendation")
+        ]
         
         # From specific findings
-        for finding in parsed_result.get("specific_findings", []):
-            if finding.get("remediation"):
-                recommendations.append(f"{finding.get('finding', 'Security Issue')}: {finding.get('remediation')}")
+        recommendations += [
+            f"{finding.get('finding', 'Security Issue')}: {finding['remediation']}"
+            for finding in parsed_result.get("specific_findings", [])
+            if finding.get("remediation")
+        ]
         
         # From authentication recommendations
-        for rec in parsed_result.get("authentication_authorization", {}).get("recommendations", []):
-            recommendations.append(f"Authentication: {rec}")
+        recommendations += [
+            f"Authentication: {rec}"
+            for rec in parsed_result.get("authentication_authorization", {}).get("recommendations", [])
+        ]
         
         return recommendations[:10]  # Limit to top 10
     
     def _extract_compliance_issues(self, parsed_result: Dict[str, Any]) -> List[str]:
         """Extract compliance issues from AI analysis"""
         
-        issues = []
         compliance = parsed_result.get("compliance_assessment", {})
         
-        for compliance_type in ["gdpr_compliance_risks", "hipaa_compliance_risks", "pci_dss_compliance_risks"]:
-            for risk in compliance.get(compliance_type, []):
-                issues.append(f"{compliance_type.replace('_compliance_risks', '').upper()}: {risk}")
-        
-        return issues
+        return [
+            f"{label}: {risk}"
+            for compliance_type, label in _COMPLIANCE_RISK_LABELS
+            for risk in compliance.get(compliance_type, [])
+        ]
     
     def _extract_best_practices(self, parsed_result: Dict[str, Any]) -> List[str]:
         """Extract best practices from AI analysis"""
         
-        practices = []
         best_practices = parsed_result.get("best_practices", {})
         
-        # Missing best practices
-        for practice in best_practices.get("missing", []):
-            practices.append(f"Implement: {practice}")
-        
-        # Priority actions
-        for action in parsed_result.get("summary", {}).get("priority_actions", []):
-            practices.append(f"Priority: {action}")
-        
-        return practices
+        # Missing best practices, then priority actions
+        return [
+            f"Implement: {practice}" for practice in best_practices.get("missing", [])
+        ] + [
+            f"Priority: {action}" for action in parsed_result.get("summary", {}).get("priority_actions", [])
+        ]
     
     def _get_cache_key(self, endpoint: str, endpoint_info: Optional[Dict[str, Any]], context: Optional[str]) -> str:
         """Generate cache key for endpoint analysis"""
         
-        data = {
-            "endpoint": endpoint,
-            "info": endpoint_info or {},
-            "context": context or ""
-        }
-        
-        data_str = json.dumps(data, sort_keys=True)
-        return hashlib.md5(data_str.encode()).hexdigest()
+        # Hash the parts incrementally instead of building one combined JSON string
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(endpoint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(orjson.dumps(endpoint_info or {}, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+        digest.update(b"\0")
+        digest.update((context or "").encode("utf-8"))
+        return digest.hexdigest()
     
     async def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get cached response if available and not expired"""
         
-        if cache_key in self._response_cache:
-            cached_data = self._response_cache[cache_key]
-            if time.time() - cached_data["timestamp"] < self._cache_ttl:
-                return cached_data["result"]
-            else:
-                # Remove expired cache
-                del self._response_cache[cache_key]
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            expires_at, result = cached
+            if time.time() < expires_at:
+                self._response_cache.move_to_end(cache_key)
+                return result
+            # Remove expired cache
+            del self._response_cache[cache_key]
         
-        return None
+        if self._redis is None:
+            return None
+        
+        try:
+            raw = await self._redis.get(self._L2_PREFIX + cache_key)
+        except Exception as e:
+            logger.warning("AI L2 cache lookup failed: %s", e)
+            return None
+        if raw is None:
+            return None
+        
+        result = orjson.loads(raw)
+        result["security_checks"] = [
+            SecurityCheck(**check) for check in result.get("security_checks", [])
+        ]
+        self._store_local(cache_key, result, self._get_cache_ttl(result))
+        return result
+    
+    def _get_cache_ttl(self, result: Dict[str, Any]) -> int:
+        """Cache lifetime for a result, by its assessed risk level; 0 means do not cache"""
+        if result.get("ai_analysis", {}).get("fallback_used"):
+            return 0
+        risk_level = result.get("security_assessment", {}).get("risk_level")
+        return _RISK_CACHE_TTLS.get(risk_level, self._cache_ttl)
     
     async def _cache_response(self, cache_key: str, result: Dict[str, Any]) -> None:
         """Cache the AI analysis result"""
         
-        self._response_cache[cache_key] = {
-            "result": result,
-            "timestamp": time.time()
-        }
+        ttl = self._get_cache_ttl(result)
+        if ttl <= 0:
+            return
+        
+        self._store_local(cache_key, result, ttl)
         
-        # Clean old cache entries if cache is getting large
-        if len(self._response_cache) > 100:
-            current_time = time.time()
-            expired_keys = [
-                key for key, data in self._response_cache.items()
-                if current_time - data["timestamp"] > self._cache_ttl
-            ]
-            for key in expired_keys:
-                del self._response_cache[key]
-    
-    def _get_fallback_response(self, endpoint: str, error: str) -> Dict[str, Any]:
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    self._L2_PREFIX + cache_key,
+                    orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS),
+                    ex=ttl
+                )
+            except Exception as e:
+                logger.warning("AI L2 cache write failed: %s", e)
+    
+    def _store_local(self, cache_key: str, result: Dict[str, Any], ttl: int) -> None:
+        """Put a result into the per-process LRU"""
+        
+        self._response_cache[cache_key] = (time.time() + ttl, result)
+        self._response_cache.move_to_end(cache_key)
+        
+        # Evict least recently used entries beyond the bound
+        while len(self._response_cache) > self._max_cache_entries:
+            self._response_cache.popitem(last=False)
+    
+    def _get_fallback_response(
+        self,
+        endpoint: str,
+        error: str,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Get fallback response when AI analysis fails"""
         
         return {
             "ai_analysis": {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": timestamp or datetime.utcnow().isoformat(),
                 "model_used": self.model,
                 "error": error,
                 "fallback_used": True
@@ -493,15 +892,7 @@ Please analyze carefully and provide detailed, actionable insights. Focus on pra
                     "evidence": "AI service unavailable or returned error"
                 }
             ],
-            "security_checks": [
-                SecurityCheck(
-                    name="ai_analysis_status",
-                    passed=False,
-                    description="AI analysis unavailable",
-                    severity="medium",
-                    details={"error": error}
-                )
-            ],
+            "security_checks": [_fallback_status_check(error)],
             "recommendations": ["AI analysis failed - use alternative analysis methods"],
             "compliance_issues": [],
             "best_practices": [],
@@ -515,9 +906,10 @@ Please analyze carefully and provide detailed, actionable insights. Focus on pra
     async def health_check(self) -> Dict[str, Any]:
         """Check AI service health"""
         
+        now = datetime.utcnow().isoformat()
         try:
             # Simple test prompt
-            test_prompt = "Respond with exactly: {'status': 'healthy', 'timestamp': '" + datetime.utcnow().isoformat() + "'}"
+            test_prompt = "Respond with exactly: {'status': 'healthy', 'timestamp': '" + now + "'}"
             
             response = await self._call_openrouter_api(test_prompt)
             
@@ -525,7 +917,7 @@ Please analyze carefully and provide detailed, actionable insights. Focus on pra
                 "status": "healthy",
                 "model": self.model,
                 "api_accessible": True,
-                "last_check": datetime.utcnow().isoformat(),
+                "last_check": now,
                 "test_response": response[:100]  # First 100 chars
             }
             
@@ -535,5 +927,5 @@ Please analyze carefully and provide detailed, actionable insights. Focus on pra
                 "model": self.model,
                 "api_accessible": False,
                 "error": str(e),
-                "last_check": datetime.utcnow().isoformat()
+                "last_check": now
             }
\ No newline at end of file
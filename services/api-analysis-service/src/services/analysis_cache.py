@@ -0,0 +1,88 @@
+"""
+Redis-backed cache for endpoint analysis results
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+
+from src.core.config import settings
+
+try:
+    import redis.asyncio as redis_async
+except ImportError:  # pragma: no cover - redis is optional
+    redis_async = None
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """TTL cache for serialized analysis results keyed by (endpoint, analysis_type)"""
+
+    KEY_PREFIX = "analysis:"
+
+    def __init__(self, redis_url: Optional[str] = None, ttl: Optional[int] = None):
+        self.ttl = ttl or settings.ANALYSIS_CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+        self._redis = None
+
+        url = redis_url or settings.REDIS_URL
+        if url and redis_async is not None:
+            self._redis = redis_async.from_url(url)
+        elif url:
+            logger.warning("REDIS_URL is set but the redis package is not installed - analysis cache disabled")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a Redis backend is configured"""
+        return self._redis is not None
+
+    def make_key(self, endpoint: str, analysis_type: Optional[str]) -> str:
+        """Build a cache key from the analysis parameters"""
+        # orjson encodes the pair unambiguously (a "|" separator could collide) straight to bytes
+        digest = hashlib.blake2b(orjson.dumps((endpoint, analysis_type)), digest_size=16).hexdigest()
+        return self.KEY_PREFIX + digest
+
+    async def get(self, endpoint: str, analysis_type: Optional[str]) -> Optional[bytes]:
+        """Return the cached payload, or None on miss or backend error"""
+        if not self.enabled:
+            return None
+
+        try:
+            raw = await self._redis.get(self.make_key(endpoint, analysis_type))
+        except Exception as e:
+            logger.warning("Analysis cache lookup failed: %s", e)
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return raw
+
+    async def set(self, endpoint: str, analysis_type: Optional[str], payload: str) -> None:
+        """Store a serialized result with the configured TTL"""
+        if not self.enabled:
+            return
+
+        try:
+            await self._redis.setex(self.make_key(endpoint, analysis_type), self.ttl, payload)
+        except Exception as e:
+            logger.warning("Analysis cache write failed: %s", e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters"""
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "analysis_cache_hit_total": self.hits,
+            "analysis_cache_miss_total": self.misses,
+        }
+
+    async def aclose(self) -> None:
+        """Close the Redis connection pool"""
+        if self._redis is not None:
+            await self._redis.aclose()
@@ -5,10 +5,14 @@ Analysis Service for API Security Analysis
 import asyncio
 import logging
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from types import MappingProxyType
+from typing import AsyncIterator, Callable, List, Mapping, Optional, Dict, Any, Set, Tuple
 from uuid import uuid4
 
+import aiohttp
+
 from src.api.models import (
     ApiAnalysisEntity,
     AnalysisResult,
@@ -21,30 +25,87 @@ from src.api.models import (
     DetailedAnalysisResult,
 )
 from src.services.security_analyzer import SecurityAnalyzer
-from src.services.storage_service import StorageService
+from src.services.storage_service import StorageService, get_storage_service
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Bulk jobs persist results in batches of up to this many entities...
+_BULK_FLUSH_SIZE = 64
+# ...written at least this often (seconds) while results keep arriving
+_BULK_FLUSH_INTERVAL = 0.05
+# Attempts per batch before its entities are counted as unsaved
+_BULK_FLUSH_ATTEMPTS = 2
+
+# Static catalogue returned (as copies) by get_available_security_checks
+_SECURITY_CHECKS: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType({
+        "name": "https_protocol",
+        "description": "Check if endpoint uses HTTPS",
+        "category": "protocol",
+        "severity": "high"
+    }),
+    MappingProxyType({
+        "name": "admin_endpoint",
+        "description": "Detect exposed admin endpoints",
+        "category": "exposure",
+        "severity": "high"
+    }),
+    MappingProxyType({
+        "name": "api_versioning",
+        "description": "Check for API versioning",
+        "category": "best_practices",
+        "severity": "medium"
+    }),
+    MappingProxyType({
+        "name": "rate_limiting",
+        "description": "Check for rate limiting headers",
+        "category": "performance",
+        "severity": "medium"
+    }),
+    MappingProxyType({
+        "name": "security_headers",
+        "description": "Check for security headers",
+        "category": "headers",
+        "severity": "medium"
+    }),
+    MappingProxyType({
+        "name": "cors_policy",
+        "description": "Check CORS configuration",
+        "category": "cors",
+        "severity": "medium"
+    }),
+)
+
 
 class AnalysisService:
     """Main service for API analysis operations"""
     
-    def __init__(self):
+    def __init__(self, storage: StorageService = None):
         self.security_analyzer = SecurityAnalyzer()
-        self.storage = StorageService()
+        self.storage = storage or get_storage_service()
         self._bulk_analysis_status: Dict[str, BulkAnalysisResponse] = {}
+        # Shared session for performance probes, created on first use
+        self._probe_session: Optional[aiohttp.ClientSession] = None
+        self._probe_session_lock = asyncio.Lock()
         
     async def analyze_endpoint(
         self,
         endpoint: str,
         analysis_type: str = "security",
-        include_performance: bool = False
+        include_performance: bool = False,
+        timestamp: Optional[datetime] = None,
+        writer: Optional[Callable[[ApiAnalysisEntity], None]] = None
     ) -> ApiAnalysisEntity:
         """
-        Analyze a single API endpoint
+        Analyze a single API endpoint.
+        With a writer (see bulk_writer), only the terminal (completed/failed) entity is handed
+        to it instead of saved.
+        Batch callers pass one shared timestamp instead of a per-entity one.
         """
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
+        # One timestamp for every entity this analysis produces
+        now = timestamp or datetime.utcnow()
         
         try:
             logger.info(f"Starting analysis for endpoint: {endpoint}")
@@ -53,11 +114,12 @@ class AnalysisService:
             analysis_entity = ApiAnalysisEntity(
                 status="analyzing",
                 endpoint=endpoint,
-                timestamp=datetime.utcnow()
+                timestamp=now
             )
             
             # Store initial status
-            await self.storage.save_analysis(analysis_entity)
+            if writer is None:
+                await self.storage.save_analysis(analysis_entity)
             
             # Perform security analysis
             security_result = await self.security_analyzer.analyze_endpoint(
@@ -91,9 +153,12 @@ class AnalysisService:
             )
             
             # Save final result
-            await self.storage.save_analysis(analysis_entity)
+            if writer is not None:
+                writer(analysis_entity)
+            else:
+                await self.storage.save_analysis(analysis_entity)
             
-            analysis_time = time.time() - start_time
+            analysis_time = (time.monotonic_ns() - start_ns) / 1e9
             logger.info(f"Analysis completed for {endpoint} in {analysis_time:.2f} seconds")
             
             return analysis_entity
@@ -105,11 +170,14 @@ class AnalysisService:
             analysis_entity = ApiAnalysisEntity(
                 status="failed",
                 endpoint=endpoint,
-                timestamp=datetime.utcnow(),
+                timestamp=now,
                 error_message=str(e)
             )
             
-            await self.storage.save_analysis(analysis_entity)
+            if writer is not None:
+                writer(analysis_entity)
+            else:
+                await self.storage.save_analysis(analysis_entity)
             raise
     
     async def get_analysis(self, analysis_id: str) -> Optional[ApiAnalysisEntity]:
@@ -149,37 +217,47 @@ class AnalysisService:
         
         try:
             bulk_response = self._bulk_analysis_status[request_id]
-            tasks = []
             
             # Process endpoints concurrently
             semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_ANALYSES)
+            timestamp = datetime.utcnow()
             
             async def analyze_with_semaphore(endpoint: str):
                 async with semaphore:
                     try:
-                        result = await self.analyze_endpoint(endpoint)
-                        return result
+                        result = await self.analyze_endpoint(
+                            endpoint, timestamp=timestamp, writer=write
+                        )
                     except Exception as e:
                         logger.error(f"Error analyzing {endpoint} in bulk: {str(e)}")
-                        return None
-            
-            # Start all analysis tasks
-            tasks = [
-                analyze_with_semaphore(endpoint) 
-                for endpoint in request.endpoints
-            ]
-            
-            # Wait for all tasks to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process results
-            for result in results:
-                if result is not None and not isinstance(result, Exception):
+                        result = None
+                
+                # Record each result as it lands
+                if result is not None:
                     bulk_response.results.append(result)
                     bulk_response.completed += 1
                 else:
                     bulk_response.failed += 1
             
+            # Keep at most twice the analysis concurrency in tasks, so large jobs do not
+            # materialize one task per endpoint up front; the semaphore bounds actual work
+            max_pending = settings.MAX_CONCURRENT_ANALYSES * 2
+            pending: Set[asyncio.Task] = set()
+            
+            # Wait for all tasks to complete, then for their results to be persisted
+            async with self.bulk_writer() as write:
+                try:
+                    for endpoint in request.endpoints:
+                        if len(pending) >= max_pending:
+                            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        pending.add(asyncio.create_task(analyze_with_semaphore(endpoint)))
+                    
+                    if pending:
+                        await asyncio.wait(pending)
+                finally:
+                    for task in pending:
+                        task.cancel()
+            
             bulk_response.status = "completed"
             logger.info(f"Bulk analysis {request_id} completed: {bulk_response.completed} success, {bulk_response.failed} failed")
             
@@ -188,6 +266,71 @@ class AnalysisService:
             bulk_response = self._bulk_analysis_status[request_id]
             bulk_response.status = "failed"
     
+    @asynccontextmanager
+    async def bulk_writer(self) -> AsyncIterator[Callable[[ApiAnalysisEntity], None]]:
+        """
+        Yield a writer for analyze_endpoint whose entities are persisted in bulk
+        by a background flusher.
+        On exit waits for pending writes and raises if any of them were not saved.
+        """
+        writes: asyncio.Queue = asyncio.Queue()
+        flusher = asyncio.create_task(self._flush_analyses(writes))
+        try:
+            yield writes.put_nowait
+        finally:
+            writes.put_nowait(None)
+            unsaved = await flusher
+        
+        if unsaved:
+            raise RuntimeError(f"Failed to persist {unsaved} bulk analysis results")
+    
+    async def _flush_analyses(self, writes: asyncio.Queue) -> int:
+        """
+        Persist queued entities with save_analyses_bulk until a None sentinel arrives.
+        Each write takes up to _BULK_FLUSH_SIZE entities or whatever arrived within
+        _BULK_FLUSH_INTERVAL of the first one, and is retried up to _BULK_FLUSH_ATTEMPTS times.
+        Returns the number of entities that could not be persisted.
+        """
+        loop = asyncio.get_running_loop()
+        unsaved = 0
+        finished = False
+        while not finished:
+            entity = await writes.get()
+            if entity is None:
+                break
+            
+            batch = [entity]
+            deadline = loop.time() + _BULK_FLUSH_INTERVAL
+            while len(batch) < _BULK_FLUSH_SIZE:
+                if writes.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        entity = await asyncio.wait_for(writes.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    entity = writes.get_nowait()
+                if entity is None:
+                    finished = True
+                    break
+                batch.append(entity)
+            
+            for attempt in range(1, _BULK_FLUSH_ATTEMPTS + 1):
+                try:
+                    await self.storage.save_analyses_bulk(batch)
+                    break
+                except Exception as e:
+                    logger.error(
+                        f"Failed to persist {len(batch)} bulk analysis results "
+                        f"(attempt {attempt}/{_BULK_FLUSH_ATTEMPTS}): {str(e)}"
+                    )
+            else:
+                unsaved += len(batch)
+        
+        return unsaved
+    
     async def get_bulk_analysis_status(self, request_id: str) -> Optional[BulkAnalysisResponse]:
         """Get status of bulk analysis"""
         return self._bulk_analysis_status.get(request_id)
@@ -198,71 +341,58 @@ class AnalysisService:
     
     async def get_available_security_checks(self) -> List[Dict[str, Any]]:
         """Get available security checks"""
-        return [
-            {
-                "name": "https_protocol",
-                "description": "Check if endpoint uses HTTPS",
-                "category": "protocol",
-                "severity": "high"
-            },
-            {
-                "name": "admin_endpoint",
-                "description": "Detect exposed admin endpoints",
-                "category": "exposure",
-                "severity": "high"
-            },
-            {
-                "name": "api_versioning",
-                "description": "Check for API versioning",
-                "category": "best_practices",
-                "severity": "medium"
-            },
-            {
-                "name": "rate_limiting",
-                "description": "Check for rate limiting headers",
-                "category": "performance",
-                "severity": "medium"
-            },
-            {
-                "name": "security_headers",
-                "description": "Check for security headers",
-                "category": "headers",
-                "severity": "medium"
-            },
-            {
-                "name": "cors_policy",
-                "description": "Check CORS configuration",
-                "category": "cors",
-                "severity": "medium"
-            }
-        ]
+        return [dict(check) for check in _SECURITY_CHECKS]
+    
+    async def _get_probe_session(self) -> aiohttp.ClientSession:
+        """Create the performance probe session lazily on the running loop"""
+        if self._probe_session is None or self._probe_session.closed:
+            async with self._probe_session_lock:
+                if self._probe_session is None or self._probe_session.closed:
+                    self._probe_session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            ssl=None if settings.PERFORMANCE_PROBE_VERIFY_SSL else False,
+                            ttl_dns_cache=300
+                        ),
+                        timeout=aiohttp.ClientTimeout(total=10),
+                        # Bodies are only counted, so keep them as sent (see _analyze_performance)
+                        auto_decompress=False
+                    )
+        return self._probe_session
+    
+    async def aclose(self) -> None:
+        """Close the performance probe session"""
+        if self._probe_session is not None and not self._probe_session.closed:
+            await self._probe_session.close()
+        self._probe_session = None
     
     async def _analyze_performance(self, endpoint: str) -> Optional[PerformanceMetrics]:
         """Analyze performance of endpoint"""
         try:
-            import aiohttp
-            import ssl
-            
-            timeout = aiohttp.ClientTimeout(total=10)
+            session = await self._get_probe_session()
+            start_ns = time.monotonic_ns()
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                start_time = time.time()
+            async with session.get(endpoint) as response:
+                load_time_ms = (time.monotonic_ns() - start_ns) / 1e6
+                
+                # content_length is the body size on the wire (after Content-Encoding): taken
+                # from the header when present, otherwise counted by streaming the undecoded body
+                content_length = response.content_length
+                if content_length is None:
+                    content_length = 0
+                    async for chunk in response.content.iter_chunked(65536):
+                        content_length += len(chunk)
+                
+                # Get SSL grade (simplified)
+                ssl_grade = self._get_ssl_grade(endpoint) if endpoint.startswith('https://') else None
+                
+                return PerformanceMetrics(
+                    response_time_ms=load_time_ms,
+                    status_code=response.status,
+                    content_length=content_length,
+                    ssl_grade=ssl_grade,
+                    load_time_ms=load_time_ms
+                )
                 
-                async with session.get(endpoint) as response:
-                    load_time = time.time() - start_time
-                    content = await response.read()
-                    
-                    # Get SSL grade (simplified)
-                    ssl_grade = self._get_ssl_grade(endpoint) if endpoint.startswith('https://') else None
-                    
-                    return PerformanceMetrics(
-                        response_time_ms=load_time * 1000,
-                        status_code=response.status,
-                        content_length=len(content),
-                        ssl_grade=ssl_grade,
-                        load_time_ms=load_time * 1000
-                    )
-                    
         except Exception as e:
             logger.warning(f"Performance analysis failed for {endpoint}: {str(e)}")
             return None
@@ -5,102 +5,44 @@
 import os
 import json
 import asyncio
+import hashlib
+import aiohttp
 import httpx
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
+from cachetools import TTLCache
+
 from .openapi_parser import OpenAPIParser
+from src.core.config import settings
+from src.core.http_client import create_openrouter_client
+from src.core.rate_limit import CreditSemaphore
 
 logger = logging.getLogger(__name__)
 
-class OpenRouterClient:
-    """Клиент для работы с OpenRouter API"""
-    
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://openrouter.ai/api/v1"
-        self.model = os.getenv("OPENROUTER_MODEL", "qwen/qwen3-coder:free")
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://security-orchestrator-microservices",
-            "X-Title": "Security Orchestrator API Analyzer"
-        }
+# Общий для процесса бюджет токенов OpenRouter в минуту: каждый запрос резервирует свой max_tokens,
+# поэтому при нагрузке запросы ждут здесь, а не получают 429 от провайдера
+_TOKEN_BUDGET = CreditSemaphore(settings.OPENROUTER_TOKEN_BUDGET_PER_MINUTE)
 
-    async def analyze_api_security(self, openapi_spec: str) -> Dict[str, Any]:
-        """
-        Анализирует безопасность API с помощью LLM
-        
-        Args:
-            openapi_spec: OpenAPI спецификация в JSON формате
-            
-        Returns:
-            Результат анализа от LLM
-        """
-        prompt = self._create_security_analysis_prompt(openapi_spec)
-        
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "Вы эксперт по безопасности API с глубокими знаниями OWASP Top 10. Анализируйте OpenAPI спецификации и выявляйте уязвимости безопасности согласно OWASP API Security Top 10. Отвечайте на русском языке в формате JSON."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.1,
-            "max_tokens": 4000
-        }
-        
-        try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return {
-                        "success": True,
-                        "analysis": result["choices"][0]["message"]["content"],
-                        "model": self.model,
-                        "tokens_used": result.get("usage", {}).get("total_tokens", 0)
-                    }
-                elif response.status_code == 402:
-                    logger.warning("OpenRouter API: недостаточно кредитов, используем rule-based анализ")
-                    return {
-                        "success": False,
-                        "error": "Insufficient credits",
-                        "fallback_used": True
-                    }
-                else:
-                    logger.error(f"OpenRouter API error: {response.status_code} - {response.text}")
-                    return {
-                        "success": False,
-                        "error": f"API error: {response.status_code}",
-                        "details": response.text
-                    }
-                    
-        except Exception as e:
-            logger.error(f"Error calling OpenRouter API: {e}")
-            return {
-                "success": False,
-                "error": f"Request failed: {str(e)}"
-            }
+# Максимальный размер спецификации в промпте (символов JSON)
+_AI_SPEC_CHAR_BUDGET = 10000
+# Более длинные description не несут информации о безопасности и удаляются
+_AI_DESCRIPTION_LIMIT = 200
 
-    def _create_security_analysis_prompt(self, openapi_spec: str) -> str:
-        """Создает промпт для анализа безопасности с фокусом на OWASP"""
-        return f"""
+# Структурный анализ спецификаций с большим числом эндпоинтов выполняется в потоке,
+# чтобы не блокировать event loop для параллельных запросов
+_STRUCTURE_THREAD_THRESHOLD = 200
+
+
+# Статичные части промпта анализа безопасности; между ними подставляется спецификация
+_PROMPT_PREFIX = """
 Проанализируй следующую OpenAPI спецификацию и выяви уязвимости безопасности согласно OWASP API Security Top 10:
 
 ```json
-{openapi_spec}
+"""
+
+_PROMPT_SUFFIX = """
 ```
 
 Проведи комплексный анализ по категориям OWASP API Security Top 10:
@@ -144,33 +86,182 @@ class OpenRouterClient:
 
 Верни ответ в формате JSON:
 
-{{
-  "owasp_analysis": {{
+{
+  "owasp_analysis": {
     "total_vulnerabilities": 0,
     "critical_count": 0,
     "high_count": 0,
     "medium_count": 0,
     "low_count": 0,
     "categories_found": ["A01", "A03", "A05"]
-  }},
+  },
   "vulnerabilities": [
-    {{
+    {
       "owasp_category": "A01:2021",
       "title": "Broken Access Control",
       "severity": "Critical",
       "endpoint": "GET /admin/users",
       "description": "Административный endpoint без аутентификации",
       "recommendation": "Добавить authentication middleware"
-    }}
+    }
   ],
   "security_score": 85,
   "recommendations": [
     "Implement proper authentication for all sensitive endpoints",
     "Add authorization checks based on user roles"
   ]
-}}
+}
 """
 
+
+class OpenRouterClient:
+    """Клиент для работы с OpenRouter API"""
+    
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.base_url = "https://openrouter.ai/api/v1"
+        self.model = os.getenv("OPENROUTER_MODEL", "qwen/qwen3-coder:free")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://security-orchestrator-microservices",
+            "X-Title": "Security Orchestrator API Analyzer"
+        }
+        # Долгоживущий клиент: соединение с OpenRouter переиспользуется между запросами.
+        # Создается при первом запросе, поэтому после aclose() объект снова пригоден к работе
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Возвращает HTTP клиент, создавая его при первом обращении или после закрытия"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_openrouter_client(self.base_url, self.headers)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Закрывает HTTP клиент; следующий запрос создаст новый"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def analyze_api_security(self, openapi_spec: str) -> Dict[str, Any]:
+        """
+        Анализирует безопасность API с помощью LLM
+        
+        Args:
+            openapi_spec: OpenAPI спецификация в JSON формате
+            
+        Returns:
+            Результат анализа от LLM
+        """
+        prompt = self._create_security_analysis_prompt(openapi_spec)
+        
+        payload = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "Вы эксперт по безопасности API с глубокими знаниями OWASP Top 10. Анализируйте OpenAPI спецификации и выявляйте уязвимости безопасности согласно OWASP API Security Top 10. Отвечайте на русском языке в формате JSON."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,
+            "max_tokens": 4000,
+            "stream": True
+        }
+        
+        try:
+            status_code, text, tokens_used = await _TOKEN_BUDGET.transact(
+                self._stream_completion(payload),
+                credits=payload["max_tokens"],
+                refund_time=60
+            )
+            
+            if status_code == 200:
+                return {
+                    "success": True,
+                    "analysis": text,
+                    "model": self.model,
+                    "tokens_used": tokens_used
+                }
+            elif status_code == 402:
+                logger.warning("OpenRouter API: недостаточно кредитов, используем rule-based анализ")
+                return {
+                    "success": False,
+                    "error": "Insufficient credits",
+                    "fallback_used": True
+                }
+            else:
+                logger.error(f"OpenRouter API error: {status_code} - {text}")
+                return {
+                    "success": False,
+                    "error": f"API error: {status_code}",
+                    "details": text
+                }
+                
+        except Exception as e:
+            logger.error(f"Error calling OpenRouter API: {e}")
+            return {
+                "success": False,
+                "error": f"Request failed: {str(e)}"
+            }
+
+    async def _stream_completion(self, payload: Dict[str, Any]) -> Tuple[int, str, int]:
+        """
+        Выполняет запрос в режиме SSE (stream=True) и собирает текст ответа по мере генерации.
+        Таймаут клиента при стриминге ограничивает только паузу между кадрами, поэтому весь
+        запрос дополнительно ограничен OPENROUTER_STREAM_TIMEOUT
+        
+        Returns:
+            HTTP статус, текст ответа модели (или тело ошибки) и число использованных токенов
+        """
+        deadline = settings.OPENROUTER_STREAM_TIMEOUT
+        try:
+            async with asyncio.timeout(deadline):
+                return await self._read_completion_stream(payload)
+        except TimeoutError:
+            raise Exception(f"OpenRouter stream did not finish within {deadline:.0f}s") from None
+
+    async def _read_completion_stream(self, payload: Dict[str, Any]) -> Tuple[int, str, int]:
+        """Читает SSE поток ответа целиком (без общего ограничения по времени)"""
+        async with self._get_client().stream("POST", "/chat/completions", json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return response.status_code, response.text, 0
+            
+            parts = []
+            tokens_used = 0
+            async for line in response.aiter_lines():
+                # SSE: кадры "data: {...}", комментарии ": ..." (keep-alive) и завершающий "data: [DONE]"
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                if not data:
+                    continue
+                
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise Exception(f"OpenRouter stream error: {chunk['error']}")
+                # Статистика токенов приходит в последнем кадре
+                usage = chunk.get("usage")
+                if usage:
+                    tokens_used = usage.get("total_tokens", tokens_used)
+                choices = chunk.get("choices")
+                if choices:
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        parts.append(content)
+            
+            return 200, "".join(parts), tokens_used
+
+    def _create_security_analysis_prompt(self, openapi_spec: str) -> str:
+        """Создает промпт для анализа безопасности с фокусом на OWASP"""
+        return _PROMPT_PREFIX + openapi_spec + _PROMPT_SUFFIX
+
 class OpenAPIAnalysisService:
     """Основной сервис анализа OpenAPI спецификаций"""
     
@@ -178,16 +269,30 @@ class OpenAPIAnalysisService:
         self.parser = OpenAPIParser()
         self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
         self.openrouter_client = None
+        # Результаты AI анализа по хешу отправляемой спецификации и анализы, выполняющиеся сейчас:
+        # одинаковые спецификации (например, один URL в пакете) дают один вызов LLM
+        self._ai_cache: TTLCache = TTLCache(maxsize=512, ttl=settings.AI_CACHE_TTL)
+        self._ai_inflight: Dict[str, asyncio.Future] = {}
         
         if self.openrouter_api_key:
             self.openrouter_client = OpenRouterClient(self.openrouter_api_key)
 
-    async def analyze_swagger_url(self, swagger_url: str) -> Dict[str, Any]:
+    async def aclose(self) -> None:
+        """Освобождает сетевые ресурсы сервиса"""
+        if self.openrouter_client:
+            await self.openrouter_client.aclose()
+
+    async def analyze_swagger_url(
+        self,
+        swagger_url: str,
+        session: Optional[aiohttp.ClientSession] = None
+    ) -> Dict[str, Any]:
         """
         Основной метод анализа Swagger URL
         
         Args:
             swagger_url: URL к swagger.json или swagger.yaml
+            session: aiohttp сессия для асинхронной загрузки (используется пакетным анализом)
             
         Returns:
             Комплексный результат анализа
@@ -196,7 +301,10 @@ class OpenAPIAnalysisService:
             logger.info(f"Начинаем анализ Swagger URL: {swagger_url}")
             
             # Шаг 1: Загрузка и парсинг спецификации
-            spec, errors = self.parser.parse_from_url(swagger_url)
+            if session is not None:
+                spec, errors = await self.parser.parse_from_url_async(swagger_url, session)
+            else:
+                spec, errors = self.parser.parse_from_url(swagger_url)
             
             if errors:
                 logger.warning(f"Ошибки при парсинге: {errors}")
@@ -209,7 +317,10 @@ class OpenAPIAnalysisService:
                 }
             
             # Шаг 2: Структурный анализ
-            structure_analysis = self._perform_structure_analysis(spec)
+            if len(spec.get('paths', [])) > _STRUCTURE_THREAD_THRESHOLD:
+                structure_analysis = await asyncio.to_thread(self._perform_structure_analysis, spec)
+            else:
+                structure_analysis = self._perform_structure_analysis(spec)
             
             # Шаг 3: AI анализ (если доступен)
             ai_analysis = None
@@ -252,14 +363,36 @@ class OpenAPIAnalysisService:
     async def _perform_ai_analysis(self, spec: Dict[str, Any]) -> Dict[str, Any]:
         """Выполняет AI анализ с помощью OpenRouter"""
         try:
-            # Конвертируем спецификацию в JSON строку для AI
-            spec_json = json.dumps(spec.get('original', {}), indent=2, ensure_ascii=False)
+            # Конвертируем спецификацию в компактный JSON, укладывающийся в бюджет токенов
+            spec_json = self._prepare_spec_for_ai(spec.get('original', {}))
+            
+            key = hashlib.blake2b(spec_json.encode("utf-8"), digest_size=16).hexdigest()
+            cached = self._ai_cache.get(key)
+            if cached is not None:
+                logger.info("AI анализ взят из кэша")
+                return cached
             
-            # Ограничиваем размер для AI модели
-            if len(spec_json) > 10000:
-                spec_json = spec_json[:10000] + "\n... [спецификация обрезана для экономии токенов]"
+            # Присоединяемся к уже идущему анализу той же спецификации
+            pending = self._ai_inflight.get(key)
+            if pending is not None:
+                return await asyncio.shield(pending)
             
-            result = await self.openrouter_client.analyze_api_security(spec_json)
+            pending = asyncio.get_running_loop().create_future()
+            self._ai_inflight[key] = pending
+            try:
+                result = await self.openrouter_client.analyze_api_security(spec_json)
+                # Ошибки не кэшируем, чтобы следующий запрос повторил попытку
+                if result.get("success"):
+                    self._ai_cache[key] = result
+                pending.set_result(result)
+            except BaseException as e:
+                pending.set_result({
+                    "success": False,
+                    "error": f"AI анализ не удался: {str(e)}"
+                })
+                raise
+            finally:
+                del self._ai_inflight[key]
             return result
             
         except Exception as e:
@@ -269,29 +402,84 @@ class OpenAPIAnalysisService:
                 "error": f"AI анализ не удался: {str(e)}"
             }
 
+    def _prepare_spec_for_ai(self, original: Dict[str, Any]) -> str:
+        """
+        Сокращает спецификацию до _AI_SPEC_CHAR_BUDGET символов, сохраняя валидный JSON:
+        убирает примеры и длинные описания, затем включает столько endpoints, сколько помещается
+        """
+        def dumps(value: Any) -> str:
+            return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+        
+        doc = self._strip_verbose_fields(original)
+        if isinstance(doc.get('components'), dict):
+            doc['components'].pop('examples', None)
+        
+        paths = doc.pop('paths', None) or {}
+        if not isinstance(paths, dict):
+            paths = {}
+        
+        # Если даже без paths не помещаемся, из components оставляем только схемы безопасности
+        if len(dumps(doc)) > _AI_SPEC_CHAR_BUDGET // 2 and isinstance(doc.get('components'), dict):
+            security_schemes = doc['components'].get('securitySchemes')
+            doc['components'] = {'securitySchemes': security_schemes} if security_schemes else {}
+        
+        # Первые endpoints целиком, пока укладываемся в бюджет (хотя бы один всегда)
+        size = len(dumps(doc)) + len(',"paths":{}')
+        kept_paths = {}
+        for path, item in paths.items():
+            item_size = len(dumps({path: item}))
+            if kept_paths and size + item_size > _AI_SPEC_CHAR_BUDGET:
+                break
+            kept_paths[path] = item
+            size += item_size
+        
+        doc['paths'] = kept_paths
+        if len(kept_paths) < len(paths):
+            doc['x-omitted-paths'] = len(paths) - len(kept_paths)
+        
+        return dumps(doc)
+
+    @classmethod
+    def _strip_verbose_fields(cls, node: Any, in_media_type: bool = False) -> Any:
+        """Копия узла спецификации без длинных description и без examples у media types"""
+        if isinstance(node, dict):
+            stripped = {}
+            for key, value in node.items():
+                if key == 'description' and isinstance(value, str) and len(value) > _AI_DESCRIPTION_LIMIT:
+                    continue
+                if in_media_type and key == 'examples':
+                    continue
+                if key == 'content' and isinstance(value, dict):
+                    stripped[key] = {
+                        media_type: cls._strip_verbose_fields(media, in_media_type=True)
+                        for media_type, media in value.items()
+                    }
+                else:
+                    stripped[key] = cls._strip_verbose_fields(value)
+            return stripped
+        if isinstance(node, list):
+            return [cls._strip_verbose_fields(item) for item in node]
+        return node
+
     def _assess_security_structure(self, spec: Dict[str, Any]) -> Dict[str, Any]:
         """Оценивает структурные аспекты безопасности"""
         security = spec.get('security', {})
-        paths = spec.get('paths', {})
+        
+        # Анализ эндпоинтов: разбиение на защищенные и незащищенные за один проход
+        protected, unprotected = [], []
+        for endpoint in spec.get('paths', []):
+            (protected if endpoint.get('security') else unprotected).append(
+                f"{endpoint.get('method', '')} {endpoint.get('path', '')}"
+            )
         
         assessment = {
             "has_authentication": bool(security.get('schemes')),
             "global_security_defined": bool(security.get('global_requirements')),
-            "unprotected_endpoints": [],
-            "protected_endpoints": [],
+            "unprotected_endpoints": unprotected,
+            "protected_endpoints": protected,
             "security_recommendations": []
         }
         
-        # Анализ эндпоинтов
-        for endpoint in spec.get('paths', []):
-            endpoint_key = f"{endpoint.get('method', '')} {endpoint.get('path', '')}"
-            has_security = bool(endpoint.get('security'))
-            
-            if has_security:
-                assessment["protected_endpoints"].append(endpoint_key)
-            else:
-                assessment["unprotected_endpoints"].append(endpoint_key)
-        
         # Рекомендации
         if not assessment["has_authentication"]:
             assessment["security_recommendations"].append(
@@ -6,6 +6,8 @@ OpenAPI/Swagger спецификация парсер
 import json
 import yaml
 import re
+import aiohttp
+import asyncio
 import requests
 from typing import Dict, List, Any, Optional, Tuple
 from urllib.parse import urljoin, urlparse
@@ -80,6 +82,54 @@ class OpenAPIParser:
             
         return {}, errors
 
+    async def parse_from_url_async(
+        self,
+        swagger_url: str,
+        session: aiohttp.ClientSession,
+        timeout: int = 30
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Асинхронный вариант parse_from_url через общую aiohttp сессию
+        
+        Args:
+            swagger_url: URL к swagger.json или swagger.yaml
+            session: Сессия с пулом соединений приложения
+            timeout: Таймаут запроса в секундах
+            
+        Returns:
+            Tuple содержащий распарсенную спецификацию и список ошибок
+        """
+        errors = []
+        
+        try:
+            logger.info("Загружаем OpenAPI спецификацию с: %s", swagger_url)
+            async with session.get(swagger_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('content-type', '').lower()
+                body = await response.read()
+            
+            if 'yaml' in content_type or 'yml' in swagger_url.lower():
+                spec = yaml.safe_load(body)
+            else:
+                spec = json.loads(body)
+            
+            return self.parse_specification(spec), errors
+            
+        except asyncio.TimeoutError:
+            errors.append("Таймаут при загрузке спецификации")
+        except aiohttp.ClientResponseError as e:
+            errors.append(f"HTTP ошибка: {e.status}")
+        except aiohttp.ClientConnectionError:
+            errors.append(f"Ошибка соединения с {swagger_url}")
+        except json.JSONDecodeError:
+            errors.append("Невалидный JSON в спецификации")
+        except yaml.YAMLError:
+            errors.append("Невалидный YAML в спецификации")
+        except Exception as e:
+            errors.append(f"Неожиданная ошибка: {str(e)}")
+            
+        return {}, errors
+
     def parse_specification(self, spec: Dict[str, Any]) -> Dict[str, Any]:
         """
         Парсит OpenAPI спецификацию и извлекает структуру API
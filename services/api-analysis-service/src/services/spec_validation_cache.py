@@ -0,0 +1,110 @@
+"""
+In-process cache for /validate-url verdicts
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from cachetools import TTLCache
+
+from src.core.config import settings
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - xxhash is optional
+    xxhash = None
+
+
+class SpecValidationCache:
+    """
+    Bounded TTL caches for spec validation: verdicts keyed by URL (revalidated via
+    ETag/Last-Modified) and parse summaries keyed by a hash of the spec body
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[int] = None):
+        self.ttl = ttl or settings.AI_CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+        self.content_hits = 0
+        self.content_misses = 0
+        # url -> (etag, last_modified, verdict)
+        self._entries: TTLCache = TTLCache(
+            maxsize=maxsize or settings.AI_MAX_CACHE_SIZE,
+            ttl=self.ttl
+        )
+        # content key -> parse summary; shared by URLs that serve identical specs
+        self._summaries: TTLCache = TTLCache(
+            maxsize=maxsize or settings.AI_MAX_CACHE_SIZE,
+            ttl=self.ttl
+        )
+        self._lock = asyncio.Lock()
+
+    async def lookup(self, url: str) -> Tuple[Dict[str, str], Optional[Dict[str, Any]]]:
+        """Conditional GET headers for the stored validators and the verdict they guard"""
+        async with self._lock:
+            entry = self._entries.get(url)
+        if entry is None:
+            return {}, None
+
+        etag, last_modified, verdict = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers, verdict
+
+    def record_hit(self) -> None:
+        """Count a 304 served from the cache"""
+        self.hits += 1
+
+    async def store(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        verdict: Dict[str, Any]
+    ) -> None:
+        """Store a fresh verdict; responses without validators are not cacheable"""
+        self.misses += 1
+        async with self._lock:
+            if etag or last_modified:
+                self._entries[url] = (etag, last_modified, verdict)
+            else:
+                self._entries.pop(url, None)
+
+    @staticmethod
+    def content_key(body: bytes) -> Hashable:
+        """Hash of the raw spec bytes (xxh3 when available, blake2b otherwise)"""
+        if xxhash is not None:
+            return xxhash.xxh3_64_intdigest(body)
+        return hashlib.blake2b(body, digest_size=16).digest()
+
+    async def get_summary(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Return the parse summary stored for identical content"""
+        async with self._lock:
+            summary = self._summaries.get(key)
+        if summary is None:
+            self.content_misses += 1
+        else:
+            self.content_hits += 1
+        return summary
+
+    async def store_summary(self, key: Hashable, summary: Dict[str, Any]) -> None:
+        """Store the parse summary for a spec body"""
+        async with self._lock:
+            self._summaries[key] = summary
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache hit/miss counters"""
+        return {
+            "spec_cache_hit_total": self.hits,
+            "spec_cache_miss_total": self.misses,
+            "spec_cache_size": len(self._entries),
+            "spec_content_hit_total": self.content_hits,
+            "spec_content_miss_total": self.content_misses,
+        }
+
+
+spec_validation_cache = SpecValidationCache()
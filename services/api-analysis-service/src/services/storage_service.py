@@ -8,6 +8,7 @@ import json
 import logging
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
@@ -45,6 +46,27 @@ class StorageService:
             
             return True
     
+    async def save_analyses_bulk(self, analyses: List[ApiAnalysisEntity]) -> bool:
+        """
+        Save several analyses under a single lock acquisition.
+        Files are written after the lock is released; raises OSError if any write failed.
+        """
+        async with self._lock:
+            for analysis in analyses:
+                self._analyses[analysis.id] = analysis
+        
+        failed = 0
+        for analysis in analyses:
+            try:
+                await self._save_to_file(analysis)
+            except Exception as e:
+                logger.warning(f"Failed to save analysis {analysis.id} to file: {e}")
+                failed += 1
+        
+        if failed:
+            raise OSError(f"Failed to save {failed} of {len(analyses)} analyses to file")
+        return True
+    
     async def get_analysis(self, analysis_id: str) -> Optional[ApiAnalysisEntity]:
         """Get analysis by ID"""
         async with self._lock:
@@ -214,4 +236,14 @@ class StorageService:
             logger.info(f"Loaded {len(self._analyses)} existing analyses")
             
         except Exception as e:
-            logger.error(f"Error loading existing data: {e}")
\ No newline at end of file
+            logger.error(f"Error loading existing data: {e}")
+
+
+@lru_cache(maxsize=1)
+def get_storage_service() -> StorageService:
+    """
+    Shared StorageService instance.
+    Must first be called from a running event loop, since construction
+    schedules the initial load of persisted analyses.
+    """
+    return StorageService()
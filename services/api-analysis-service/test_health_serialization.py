@@ -0,0 +1,69 @@
+"""
+Tests for the pre-serialized /health response body
+"""
+
+import asyncio
+import importlib.util
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from pydantic import TypeAdapter
+
+SERVICE_DIR = Path(__file__).resolve().parent
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+
+def _load_module(name: str, relative_path: str):
+    """Load a module from its file; src/api/models.py and routes.py are shadowed by packages"""
+    spec = importlib.util.spec_from_file_location(name, SERVICE_DIR / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _load_routes():
+    """routes.py creates its AnalysisService at import, which needs a running loop"""
+    return _load_module("src.api.routes", "src/api/routes.py")
+
+
+@pytest.fixture(scope="module")
+def health_modules():
+    """Yield (models, routes) loaded from their files, restoring sys.modules afterwards"""
+    import src.api  # noqa: F401  (parent package must exist before loading submodules)
+
+    names = ("src.api.models", "src.api.routes")
+    saved = {name: sys.modules.get(name) for name in names}
+    try:
+        models = _load_module("src.api.models", "src/api/models.py")
+        routes = asyncio.run(_load_routes())
+        yield models, routes
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        datetime(2024, 5, 17, 12, 30, 45, 123456),
+        datetime(2024, 5, 17, 12, 30, 45),
+    ],
+    ids=["with-microseconds", "without-microseconds"],
+)
+def test_health_body_matches_model_serialization(health_modules, timestamp):
+    """Hand-assembled health bytes must equal HealthStatus serialized by pydantic"""
+    models, routes = health_modules
+
+    body = routes._HEALTH_PREFIX + timestamp.isoformat().encode() + routes._HEALTH_SUFFIX
+    expected = TypeAdapter(models.HealthStatus).dump_json(
+        models.HealthStatus(timestamp=timestamp, version=routes._SERVICE_VERSION)
+    )
+
+    assert body == expected